@@ -2,17 +2,21 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
 from auth.jwt_handler import verify_jwt_token
+from auth.user_cache import user_cache
 
-from sqlmodel import Session, select
-from database.connection import get_session
-from models.users import User
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database.connection import get_async_session
 
 # 요청이 들어올 때 Authorization 헤더의 토큰 값을 추출
 # tokenUrl : 클라이언트가 토큰을 요청할 때 사용할 엔드포인트로, 
 #            FastAPI의 자동 문서화에 사용되는 정보
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/signin")
 
-async def authenticate(token: str = Depends(oauth2_scheme)):
+async def get_token_payload(token: str = Depends(oauth2_scheme)) -> dict:
+    """
+    검증된 토큰 클레임을 반환합니다.
+    FastAPI가 요청 단위로 의존성 결과를 재사용하므로 한 요청에서 토큰 검증은 한 번만 수행됩니다.
+    """
     if not token:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -20,17 +24,25 @@ async def authenticate(token: str = Depends(oauth2_scheme)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    payload = verify_jwt_token(token)
+    return verify_jwt_token(token)
+
+async def authenticate(payload: dict = Depends(get_token_payload)):
     return payload["user_id"]
 
 async def get_current_user_role(
-    user_id: int = Depends(authenticate), # authenticate 함수가 반환하는 user_id에 의존
-    session: Session = Depends(get_session)
+    payload: dict = Depends(get_token_payload),
+    session: AsyncSession = Depends(get_async_session)
 ) -> str:
     """
-    인증된 사용자의 ID를 기반으로 데이터베이스에서 사용자 역할을 조회하여 반환합니다.
+    인증된 사용자의 역할을 반환합니다.
+    토큰 발급 시 서명된 role 클레임을 사용하므로 DB를 조회하지 않습니다.
+    role 클레임이 없는 예전 토큰만 사용자 캐시/DB에서 조회합니다.
     """
-    user = session.exec(select(User).where(User.id == user_id)).first()
+    role = payload.get("role")
+    if role:
+        return role
+
+    user = await user_cache.get_or_load(session, payload["user_id"])
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="사용자를 찾을 수 없습니다.")
-    return user.role # 사용자의 role 반환
\ No newline at end of file
+    return user.role # 사용자의 role 반환
@@ -1,9 +1,26 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
 from passlib.context import CryptContext
 
+from database.connection import settings
+
 
 class HashPassword:
-    def __init__(self):
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    def __init__(self, rounds: Optional[int] = None, max_workers: Optional[int] = None):
+        self.rounds = rounds or settings.BCRYPT_ROUNDS
+        # min/max rounds를 설정값으로 고정하면 cost가 다른 기존 해시는 needs_update 대상이 됨
+        self.pwd_context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=self.rounds,
+            bcrypt__min_rounds=self.rounds,
+            bcrypt__max_rounds=self.rounds,
+        )
+        # bcrypt는 GIL을 해제하므로 스레드 풀에서 실행하면 이벤트 루프를 막지 않음
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or settings.BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+        self.queue_depth = 0 # 실행 대기 + 실행 중인 해시 작업 수
 
 
     def hash_password(self, password: str):
@@ -11,4 +28,29 @@ class HashPassword:
 
     def verify_password(self, plain_password: str, hashed_password: str):
         return self.pwd_context.verify(plain_password, hashed_password)
-        
\ No newline at end of file
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return self.pwd_context.needs_update(hashed_password)
+
+    async def _run(self, func, *args):
+        self.queue_depth += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.queue_depth -= 1
+
+    async def hash_password_async(self, password: str) -> str:
+        return await self._run(self.pwd_context.hash, password)
+
+    async def verify_password_async(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self.pwd_context.verify, plain_password, hashed_password)
+
+    async def verify_and_update_async(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        비밀번호를 검증하고, 저장된 해시의 cost가 현재 설정과 다르면 새 해시를 함께 반환합니다.
+        반환값: (일치 여부, 새 해시 또는 None)
+        """
+        return await self._run(self.pwd_context.verify_and_update, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {"rounds": self.rounds, "queue_depth": self.queue_depth, "workers": self._executor._max_workers}
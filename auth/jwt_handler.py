@@ -1,11 +1,18 @@
+import hashlib
+from collections import OrderedDict
 from time import time
 from fastapi import HTTPException, status
-from jose import jwt
+from jose import ExpiredSignatureError, JWTError, jwt
 from database.connection import Settings
 
 
 settings = Settings()
 
+# 검증이 끝난 토큰 캐시 (토큰 sha256 -> 클레임)
+# 같은 토큰이 만료 전까지 여러 번 사용되므로 서명 검증을 한 번만 수행
+JWT_CACHE_SIZE = 10000
+_verified_tokens: "OrderedDict[bytes, dict]" = OrderedDict()
+
 
 # JWT 토큰 생성
 def create_jwt_token(email: str, user_id: int, role: str) -> str:
@@ -14,15 +21,40 @@ def create_jwt_token(email: str, user_id: int, role: str) -> str:
     return token
 
 
-# JWT 토큰 검증
-def verify_jwt_token(token: str):
+def decode_jwt_token(token: str) -> dict:
+    """캐시를 사용하지 않고 서명과 만료 시간을 검증합니다."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        exp = payload.get("exp")
-        if exp is None: 
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token")
-        if time() > exp:
+    except ExpiredSignatureError:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Token expired")
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token")
+
+    exp = payload.get("exp")
+    if exp is None: 
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token")
+    if time() > exp:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Token expired")
+    return payload
+
+
+# JWT 토큰 검증
+def verify_jwt_token(token: str):
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = _verified_tokens.get(key)
+    if payload is not None:
+        if time() > payload["exp"]:
+            _verified_tokens.pop(key, None)
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Token expired")
+        _verified_tokens.move_to_end(key)
         return payload
-    except:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token")
\ No newline at end of file
+
+    payload = decode_jwt_token(token)
+    _verified_tokens[key] = payload
+    while len(_verified_tokens) > JWT_CACHE_SIZE:
+        _verified_tokens.popitem(last=False)
+    return payload
+
+
+def clear_jwt_cache():
+    _verified_tokens.clear()
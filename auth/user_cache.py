@@ -0,0 +1,54 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.users import User
+
+
+class UserCache:
+    """
+    사용자 행 캐시 (LRU + TTL).
+    사용자 정보가 바뀌는 곳에서는 반드시 invalidate(user_id)를 호출해야 합니다.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 300):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict() # user_id -> (User, 저장 시각)
+
+    def get(self, user_id: int) -> Optional[User]:
+        entry = self._entries.get(user_id)
+        if not entry:
+            return None
+        user, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return user
+
+    def put(self, user: User):
+        # 세션과 분리된 복사본을 저장 (다른 요청의 세션에서 지연 로딩/만료되지 않도록)
+        self._entries[user.id] = (User(**user.model_dump()), time.monotonic())
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        self._entries.pop(user_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    async def get_or_load(self, session: AsyncSession, user_id: int) -> Optional[User]:
+        user = self.get(user_id)
+        if user is None:
+            user = await session.get(User, user_id)
+            if user:
+                self.put(user)
+        return user
+
+
+user_cache = UserCache()
@@ -0,0 +1,325 @@
+"""
+API 주요 경로 벤치마크 (외부 서비스 없이 실행)
+
+    python -m benchmarks.api_bench --diaries 10000 --requests 500 --concurrency 20
+    python -m benchmarks.api_bench --scenarios feed search --clova-latency-ms 300 --output result.json
+
+임시 SQLite DB에 사용자/일기를 시드한 뒤 main:app 을 프로세스 안에서 띄우고
+(httpx ASGITransport, lifespan 포함) 동시 비동기 클라이언트로 각 엔드포인트를 호출합니다.
+Clova는 httpx.MockTransport, S3는 moto로 대체하며 각각 응답 지연을 줄 수 있습니다.
+
+결과는 시나리오별 처리량, p50/p95/p99 지연 시간, 요청당 SQL 쿼리 수를 JSON으로 출력하므로
+실행 결과를 파일로 남겨 비교할 수 있습니다.
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+SCENARIOS = ["feed", "search", "create", "signin", "presigned"]
+
+WORDS = [
+    "오늘", "친구", "회사", "학교", "산책", "커피", "점심", "저녁", "영화", "여행", "비", "날씨", "주말", "운동",
+    "행복", "짜증", "슬픔", "피곤", "설레", "걱정", "감사", "맛있", "하루", "가족", "공부", "게임", "음악", "바다",
+]
+SEARCH_QUERIES = ["오늘 하루", "친구", "커피", "여행", "행복", "회사 점심", "주말 영화", "비"]
+
+BENCH_PASSWORD = "bench-password"
+
+# 요청마다 실행된 SQL 수를 세기 위한 카운터 (백그라운드 워커 쿼리는 포함하지 않음)
+_query_counter: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar("query_counter", default=None)
+
+
+def configure_environment(args, db_path: str):
+    # 앱 모듈을 import 하기 전에 설정해야 Settings / 모듈 상수에 반영됨
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ["EMOTION_MODE"] = args.emotion_mode
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    for key, value in {
+        "SECRET_KEY": "bench-secret",
+        "AWS_ACCESS_KEY": "testing", "AWS_SECRET_KEY": "testing",
+        "AWS_S3_BUCKET": "bench-bucket", "AWS_REGION": "ap-northeast-2",
+        "AWS_ACCESS_KEY_ID": "testing", "AWS_SECRET_ACCESS_KEY": "testing",
+        "GOOGLE_CLIENT_ID": "bench", "GOOGLE_CLIENT_SECRET": "bench", "GOOGLE_REDIRECT_URI": "http://localhost/callback",
+        "CLOVA_API_KEY": "bench",
+    }.items():
+        os.environ.setdefault(key, value)
+
+
+def clova_transport(latency: float):
+    """Clova chat-completions 응답을 흉내 내는 MockTransport (단건/배치 프롬프트 모두 지원)"""
+    import httpx
+
+    labels = ["긍정", "부정", "중립", "슬픔", "놀람"]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if latency:
+            await asyncio.sleep(latency)
+        content = json.loads(request.content)["messages"][-1]["content"]
+        numbers = re.findall(r"^(\d+)\.", content, re.MULTILINE)
+        if numbers:
+            answer = "\n".join(f"{number}. {labels[int(number) % len(labels)]}" for number in numbers)
+        else:
+            answer = labels[len(content) % len(labels)]
+        return httpx.Response(200, json={"result": {"message": {"role": "assistant", "content": answer}}})
+
+    return httpx.MockTransport(handler)
+
+
+def start_s3_mock(latency: float):
+    from moto import mock_aws
+
+    mock = mock_aws()
+    mock.start()
+    from utils.s3 import BUCKET_NAME, s3
+
+    if s3.meta.region_name == "us-east-1":
+        s3.create_bucket(Bucket=BUCKET_NAME)
+    else:
+        s3.create_bucket(Bucket=BUCKET_NAME, CreateBucketConfiguration={"LocationConstraint": s3.meta.region_name})
+    if latency:
+        # 실제 S3 왕복 시간을 흉내 냄 (presigned URL 생성처럼 네트워크를 쓰지 않는 호출에는 영향 없음)
+        s3.meta.events.register("before-call.s3", lambda **kwargs: time.sleep(latency))
+    return mock
+
+
+def install_query_counter():
+    from sqlalchemy import event
+    from database.connection import async_engine, engine_url
+
+    # 벤치마크 중 SQL 로그 출력 비용 제외
+    engine_url.echo = False
+    async_engine.echo = False
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        counter = _query_counter.get()
+        if counter is not None:
+            counter[0] += 1
+
+
+async def seed(args) -> List[dict]:
+    """사용자와 일기를 시드합니다. 같은 --seed 값이면 같은 데이터가 만들어집니다."""
+    from sqlalchemy import insert
+    from auth.hash_password import HashPassword
+    from database.connection import AsyncSessionLocal, async_engine, conn
+    from models.diarys import Diary
+    from models.users import User
+    from utils.emotion_stats import rebuild_emotion_stats
+    from utils.search import rebuild_index
+
+    conn()
+    rng = random.Random(args.seed)
+    password = HashPassword().hash_password(BENCH_PASSWORD) # 같은 해시를 모든 사용자가 공유 (시드 시간 단축)
+    users = [
+        {"id": i, "email": f"bench{i}@example.com", "username": f"bench{i}", "password": password, "role": "user"}
+        for i in range(1, args.users + 1)
+    ]
+    start = datetime(2020, 1, 1)
+    diaries = []
+    for i in range(args.diaries):
+        user_id = i % args.users + 1
+        diaries.append({
+            "title": " ".join(rng.choices(WORDS, k=3)),
+            "content": " ".join(rng.choices(WORDS, k=rng.randint(20, 80))),
+            "image": "",
+            "state": rng.random() < 0.7,
+            "emotion": rng.choice(["긍정", "부정", "중립", "슬픔", "놀람"]),
+            "emotion_status": "done",
+            "user_id": user_id,
+            "created_at": start + timedelta(minutes=i),
+            "diary_date": (start + timedelta(days=i // args.users)).date(), # (user_id, diary_date) 유니크
+        })
+
+    async with async_engine.begin() as connection:
+        await connection.execute(insert(User), users)
+        for i in range(0, len(diaries), 1000):
+            await connection.execute(insert(Diary), diaries[i:i + 1000])
+    async with AsyncSessionLocal() as session:
+        await rebuild_index(session)
+        await rebuild_emotion_stats(session)
+    return users
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class ScenarioRunner:
+    def __init__(self, client, users: List[dict], rng: random.Random):
+        from auth.jwt_handler import create_jwt_token
+
+        self.client = client
+        self.users = users
+        self.rng = rng
+        self.tokens = {
+            user["id"]: {"Authorization": f"Bearer {create_jwt_token(user['email'], user['id'], user['role'])}"}
+            for user in users
+        }
+        self._create_dates: Dict[int, date] = {user["id"]: date(2100, 1, 1) for user in users}
+
+    def _headers(self):
+        return self.tokens[self.rng.choice(self.users)["id"]]
+
+    async def feed(self):
+        return await self.client.get("/diarys/", params={"limit": 20}, headers=self._headers())
+
+    async def search(self):
+        return await self.client.get(
+            "/diarys/list/search", params={"search": self.rng.choice(SEARCH_QUERIES), "limit": 20}, headers=self._headers()
+        )
+
+    async def create(self):
+        user = self.rng.choice(self.users)
+        diary_date = self._create_dates[user["id"]]
+        self._create_dates[user["id"]] = diary_date + timedelta(days=1) # 중복(409) 없이 계속 작성
+        return await self.client.post("/diarys/", headers=self.tokens[user["id"]], json={
+            "title": " ".join(self.rng.choices(WORDS, k=3)),
+            "content": " ".join(self.rng.choices(WORDS, k=40)),
+            "state": True,
+            "image": "",
+            "diary_date": diary_date.isoformat(),
+        })
+
+    async def signin(self):
+        user = self.rng.choice(self.users)
+        return await self.client.post("/users/signin", data={"username": user["email"], "password": BENCH_PASSWORD})
+
+    async def presigned(self):
+        return await self.client.get("/diarys/presigned-url", params={"file_type": "png"}, headers=self._headers())
+
+    async def run(self, name: str, requests: int, concurrency: int, warmup: int) -> dict:
+        call = getattr(self, name)
+        for _ in range(warmup):
+            await call()
+
+        latencies: List[float] = []
+        queries: List[int] = []
+        errors: Dict[str, int] = {}
+        remaining = iter(range(requests))
+
+        async def worker():
+            for _ in remaining:
+                counter = [0]
+                token = _query_counter.set(counter)
+                started = time.perf_counter()
+                try:
+                    response = await call()
+                    if response.status_code >= 400:
+                        errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+                except Exception as e:
+                    errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                finally:
+                    latencies.append(time.perf_counter() - started)
+                    _query_counter.reset(token)
+                    queries.append(counter[0])
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            "requests": requests,
+            "errors": errors,
+            "duration_s": round(elapsed, 4),
+            "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "mean": round(statistics.fmean(latencies) * 1000, 3),
+                "p50": round(percentile(latencies, 50) * 1000, 3),
+                "p95": round(percentile(latencies, 95) * 1000, 3),
+                "p99": round(percentile(latencies, 99) * 1000, 3),
+                "max": round(latencies[-1] * 1000, 3),
+            },
+            "queries_per_request": round(statistics.fmean(queries), 2),
+        }
+
+
+async def run_benchmark(args) -> dict:
+    import httpx
+
+    mock = start_s3_mock(args.s3_latency_ms / 1000)
+    try:
+        install_query_counter()
+        users = await seed(args)
+
+        from main import app
+        from utils import clova
+
+        async with app.router.lifespan_context(app):
+            await clova.init_client(transport=clova_transport(args.clova_latency_ms / 1000))
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                runner = ScenarioRunner(client, users, random.Random(args.seed))
+                results = {}
+                for name in args.scenarios:
+                    requests = args.signin_requests if name == "signin" else args.requests
+                    results[name] = await runner.run(name, requests, args.concurrency, args.warmup)
+                    print(f"{name}: {results[name]['throughput_rps']} req/s, "
+                          f"p95 {results[name]['latency_ms']['p95']} ms", file=sys.stderr)
+        return results
+    finally:
+        mock.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API 주요 경로 벤치마크")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--diaries", type=int, default=10000, help="시드할 일기 수")
+    parser.add_argument("--requests", type=int, default=500, help="시나리오별 요청 수")
+    parser.add_argument("--signin-requests", type=int, default=100, help="로그인 시나리오 요청 수 (bcrypt 비용이 커서 별도 지정)")
+    parser.add_argument("--concurrency", type=int, default=20, help="동시 클라이언트 수")
+    parser.add_argument("--warmup", type=int, default=5, help="시나리오별 측정 전 요청 수")
+    parser.add_argument("--clova-latency-ms", type=float, default=200, help="Clova 모의 응답 지연")
+    parser.add_argument("--s3-latency-ms", type=float, default=20, help="S3 모의 호출 지연")
+    parser.add_argument("--emotion-mode", default="hybrid", choices=["hybrid", "local", "clova"])
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="SQLite DB 파일 경로 (기본: 임시 파일, 실행마다 새로 생성)")
+    parser.add_argument("--overwrite", action="store_true", help="--db 파일이 이미 있으면 삭제하고 다시 시드 (지정하지 않으면 중단)")
+    parser.add_argument("--output", help="결과 JSON을 저장할 파일 (기본: 표준 출력)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = args.db or os.path.join(tmpdir, "bench.db")
+        if os.path.exists(db_path):
+            if not args.overwrite:
+                # 개발용 DB를 실수로 지우지 않도록 명시적으로 요청한 경우에만 삭제
+                parser.error(f"{db_path} 파일이 이미 있습니다. 삭제하고 다시 시드하려면 --overwrite를 지정하세요.")
+            os.remove(db_path)
+        configure_environment(args, db_path)
+        with redirect_stdout(sys.stderr): # 표준 출력에는 결과 JSON만 남김
+            results = asyncio.run(run_benchmark(args))
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "db", "overwrite")},
+        "results": results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
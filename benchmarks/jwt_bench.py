@@ -0,0 +1,39 @@
+"""
+JWT 검증 캐시 벤치마크
+
+    python -m benchmarks.jwt_bench --tokens 100 --iterations 20000
+
+캐시를 사용하는 verify_jwt_token 과 매번 서명을 검증하는 decode_jwt_token 의
+호출당 평균 시간을 비교합니다.
+"""
+import argparse
+import time
+
+from auth.jwt_handler import clear_jwt_cache, create_jwt_token, decode_jwt_token, verify_jwt_token
+
+
+def measure(func, tokens, iterations: int) -> float:
+    started = time.perf_counter()
+    for i in range(iterations):
+        func(tokens[i % len(tokens)])
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JWT 검증 캐시 벤치마크")
+    parser.add_argument("--tokens", type=int, default=100, help="서로 다른 토큰 수 (동시 접속 사용자 수)")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    tokens = [create_jwt_token(f"user{i}@example.com", i, "user") for i in range(args.tokens)]
+
+    uncached = measure(decode_jwt_token, tokens, args.iterations)
+    clear_jwt_cache()
+    cached = measure(verify_jwt_token, tokens, args.iterations)
+
+    print(f"uncached: {uncached:8.2f} us/call")
+    print(f"cached:   {cached:8.2f} us/call  (x{uncached / cached:.1f})")
+
+
+if __name__ == "__main__":
+    main()
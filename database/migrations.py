@@ -0,0 +1,73 @@
+import logging
+from typing import List, Set
+
+from sqlalchemy import func, inspect, select, text
+from sqlmodel import SQLModel
+
+logger = logging.getLogger("uvicorn.error")
+
+# DB에 실제로 존재하는 유니크 인덱스 이름 (없으면 애플리케이션에서 중복을 직접 확인해야 함)
+enforced_unique_indexes: Set[str] = set()
+
+
+def _duplicate_rows(connection, index, limit: int = 20) -> List[tuple]:
+    """유니크 인덱스를 만들 수 없게 하는 중복 값 목록 (값..., 행 수)"""
+    columns = list(index.columns)
+    return connection.execute(
+        select(*columns, func.count())
+        .group_by(*columns)
+        .having(func.count() > 1)
+        .limit(limit)
+    ).all()
+
+
+def upgrade_schema(engine) -> List[str]:
+    """
+    create_all은 이미 있는 테이블을 변경하지 않으므로, 모델에 추가된 컬럼/인덱스 중 DB에 없는 것을 추가합니다.
+    (예: diary.emotion_status, diary.thumbnail, diary.image_medium, 피드 keyset 인덱스)
+    기존 행에 값을 채울 수 없는 NOT NULL 컬럼은 추가하지 않고 경고만 남깁니다.
+    유니크 인덱스는 기존 데이터에 중복이 있으면 만들지 않고 중복 목록을 경고로 남깁니다.
+    (사용자 데이터를 임의로 지우지 않음, 중복을 정리한 뒤 다시 실행) 적용한 변경 목록을 반환합니다.
+    """
+    applied = []
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        quote = connection.dialect.identifier_preparer.quote
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                if not column.nullable:
+                    logger.warning(f"{table.name}.{column.name} 컬럼은 NOT NULL이라 자동으로 추가하지 않습니다.")
+                    continue
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"))
+                applied.append(f"컬럼 추가: {table.name}.{column.name}")
+
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing_indexes:
+                    if index.unique:
+                        enforced_unique_indexes.add(index.name)
+                    continue
+                if index.unique:
+                    duplicates = _duplicate_rows(connection, index)
+                    if duplicates:
+                        enforced_unique_indexes.discard(index.name)
+                        logger.warning(
+                            f"{table.name}에 중복 값이 있어 유니크 인덱스 {index.name}를 만들지 않았습니다. "
+                            f"중복을 정리한 뒤 python manage.py migrate 를 실행하세요. 중복 예: {duplicates}"
+                        )
+                        continue
+                index.create(connection)
+                if index.unique:
+                    enforced_unique_indexes.add(index.name)
+                applied.append(f"인덱스 추가: {index.name}")
+
+    for change in applied:
+        logger.info(f"스키마 변경 적용 - {change}")
+    return applied
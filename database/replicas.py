@@ -0,0 +1,207 @@
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, Request
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from auth.jwt_handler import verify_jwt_token
+from database.connection import AsyncSessionLocal, _pool_options, settings, to_async_url
+
+logger = logging.getLogger("uvicorn.error")
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class Replica:
+    def __init__(self, url: str):
+        async_url = to_async_url(url)
+        self.name = async_url.rsplit("@", 1)[-1] # 로그/통계용 (계정 정보 제외)
+        self.engine = create_async_engine(async_url, echo=settings.DB_ECHO, **_pool_options(async_url))
+        self.sessionmaker = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.active = 0 # 현재 사용 중인 세션 수 (least_connections 선택 기준)
+        self.ejected_until = 0.0 # 이 시각까지 선택 대상에서 제외
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+
+class ReplicaRouter:
+    """
+    읽기 전용 GET 요청을 읽기 복제본으로 분산합니다.
+    - 선택 방식: round_robin / least_connections
+    - 연결 오류가 난 복제본은 eject_seconds 동안 제외하고, 주기적인 헬스 체크(SELECT 1)로 복귀시킵니다.
+    - 사용자가 쓰기 요청을 보낸 뒤 sticky_seconds 동안은 그 사용자의 읽기를 기본 DB로 보냅니다 (복제 지연 대비).
+      쓰기 기록은 프로세스 메모리에 있으므로 여러 워커 프로세스 사이에서는 공유되지 않습니다.
+    """
+
+    def __init__(self, urls: List[str], strategy: str, sticky_seconds: float, eject_seconds: float, health_interval: float):
+        self.replicas = [Replica(url) for url in urls]
+        self.strategy = strategy
+        self.sticky_seconds = sticky_seconds
+        self.eject_seconds = eject_seconds
+        self.health_interval = health_interval
+        self._round_robin = itertools.count()
+        self._recent_writers: Dict[int, float] = {} # user_id -> 기본 DB에서 읽어야 하는 마지막 시각
+        self._health_task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def mark_write(self, user_id: int):
+        now = time.monotonic()
+        self._recent_writers[user_id] = now + self.sticky_seconds
+        if len(self._recent_writers) > 10000:
+            # 만료된 항목 정리
+            self._recent_writers = {key: until for key, until in self._recent_writers.items() if until > now}
+
+    def is_sticky(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        until = self._recent_writers.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    def choose(self) -> Optional[Replica]:
+        candidates = [replica for replica in self.replicas if replica.available]
+        if not candidates:
+            return None # 모든 복제본이 제외되면 기본 DB 사용
+        if self.strategy == "least_connections":
+            return min(candidates, key=lambda replica: replica.active)
+        return candidates[next(self._round_robin) % len(candidates)]
+
+    def eject(self, replica: Replica, reason: str):
+        if replica.available:
+            logger.warning(f"읽기 복제본 {replica.name} 제외 ({self.eject_seconds}초): {reason.splitlines()[0] if reason else ''}")
+        replica.ejected_until = time.monotonic() + self.eject_seconds
+
+    async def check_health(self):
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as connection:
+                    await asyncio.wait_for(connection.execute(text("SELECT 1")), timeout=5)
+            except Exception as e:
+                self.eject(replica, str(e))
+            else:
+                if not replica.available:
+                    logger.info(f"읽기 복제본 {replica.name} 복귀")
+                replica.ejected_until = 0.0
+
+    async def _run_health_checks(self):
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_interval)
+
+    async def start(self):
+        if self.enabled:
+            self._health_task = asyncio.create_task(self._run_health_checks())
+
+    async def stop(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> List[dict]:
+        return [
+            {"name": replica.name, "active": replica.active, "available": replica.available}
+            for replica in self.replicas
+        ]
+
+
+def request_user_id(request: Request) -> Optional[int]:
+    # 인증 의존성보다 먼저 실행될 수 있으므로 헤더의 토큰을 직접 확인 (검증 결과는 캐시됨)
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return verify_jwt_token(token).get("user_id")
+    except HTTPException:
+        return None
+
+
+replica_router = ReplicaRouter(
+    urls=[url.strip() for url in (settings.READ_REPLICA_URLS or "").split(",") if url.strip()],
+    strategy=settings.READ_REPLICA_STRATEGY,
+    sticky_seconds=settings.READ_REPLICA_STICKY_SECONDS,
+    eject_seconds=settings.READ_REPLICA_EJECT_SECONDS,
+    health_interval=settings.READ_REPLICA_HEALTH_INTERVAL,
+)
+
+
+@asynccontextmanager
+async def read_session(user_id: Optional[int] = None):
+    """
+    읽기 전용 세션을 엽니다. 복제본이 없거나, 모두 제외되었거나,
+    user_id 사용자가 방금 쓰기를 했다면 기본 DB 세션을 사용합니다.
+    요청 의존성 밖에서 세션을 여는 경우(StreamingResponse 내보내기 등)에 사용합니다.
+    """
+    replica = None
+    if replica_router.enabled and not replica_router.is_sticky(user_id):
+        replica = replica_router.choose()
+    if replica is None:
+        async with AsyncSessionLocal() as session:
+            yield session
+        return
+
+    replica.active += 1
+    try:
+        async with replica.sessionmaker() as session:
+            session.info["replica"] = replica.name
+            yield session
+    except (OperationalError, OSError) as e:
+        replica_router.eject(replica, str(e))
+        raise
+    except DBAPIError as e:
+        if e.connection_invalidated:
+            replica_router.eject(replica, str(e))
+        raise
+    finally:
+        replica.active -= 1
+
+
+async def get_read_session(request: Request):
+    """읽기 전용 라우트용 세션 (read_session 참고)"""
+    async with read_session(request_user_id(request)) as session:
+        yield session
+
+
+def is_replica_session(session) -> bool:
+    """
+    get_read_session이 복제본 세션을 반환했는지 확인합니다.
+    복제본에서 읽은 결과는 복제 지연으로 쓰기 이전 데이터일 수 있으므로 응답 캐시에 저장하지 않습니다.
+    (캐시는 쓰기 시점에만 무효화되므로, 저장하면 다음 쓰기까지 오래된 응답이 남음)
+    """
+    return "replica" in session.info
+
+
+class ReadYourWritesMiddleware:
+    """쓰기 요청(GET/HEAD/OPTIONS 이외)이 성공하면 해당 사용자를 잠시 기본 DB로 고정합니다."""
+
+    def __init__(self, app, router: ReplicaRouter):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        user_id = request_user_id(Request(scope))
+        if user_id is not None:
+            # 처리 중에도 읽기가 기본 DB로 가도록 먼저 기록하고, 응답 후 다시 기록해 창을 연장
+            self.router.mark_write(user_id)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if user_id is not None:
+                self.router.mark_write(user_id)
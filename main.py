@@ -1,8 +1,17 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from routes.users import user_router
 from routes.diary import diary_router
-from database.connection import conn
+from routes.profiling import profiling_router
+from database.connection import async_engine, conn, settings
+from database.replicas import ReadYourWritesMiddleware, replica_router
+from utils.emotion_worker import emotion_worker
+from utils.emotion_cache import emotion_cache
+from utils import clova
+from utils import images
+from utils.metrics import MetricsMiddleware, instrument_engine, registry
+from utils.profiling import ProfilingMiddleware, profile_store
 from starlette.middleware.sessions import SessionMiddleware  
 from fastapi.middleware.cors import CORSMiddleware
 app = FastAPI()
@@ -11,9 +20,17 @@ async def lifespan(app: FastAPI):
     # 애플리케이션이 시작될 때 실행 코드
     print("애플리케이션 시작")
     conn()
+    await clova.init_client() # Clova 공유 HTTP 클라이언트 (커넥션 재사용)
+    await emotion_cache.purge_expired() # 만료된 감정 분석 캐시 정리
+    await emotion_worker.start() # 감정 분석 백그라운드 워커 시작
+    await replica_router.start() # 읽기 복제본 헬스 체크 시작
 
     yield
     # 애플리케이션이 종료될 때 실행 코드
+    await emotion_worker.stop()
+    await replica_router.stop()
+    await clova.close_client()
+    images.shutdown_executor()
     print("애플리케이션 종료")
 
 app.add_middleware(
@@ -39,8 +56,29 @@ app.add_middleware(
     secret_key="your_session_secret_key"  # 반드시 충분히 복잡한 값으로 설정!
 )
 
+# 읽기 복제본을 사용할 때만 쓰기 직후 읽기를 기본 DB로 고정하는 미들웨어 등록
+if replica_router.enabled:
+    app.add_middleware(ReadYourWritesMiddleware, router=replica_router)
+
+# 요청 프로파일링: 켜져 있을 때만 등록 (꺼져 있으면 미들웨어/엔드포인트가 없으므로 비용 없음)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware, store=profile_store, sample_rate=settings.PROFILE_SAMPLE_RATE)
+
+# 요청별 지연 시간/SQL 수/SQL 시간 계측 (가장 바깥 미들웨어로 등록해 전체 처리 시간을 측정)
+instrument_engine(async_engine)
+for replica in replica_router.replicas:
+    instrument_engine(replica.engine)
+app.add_middleware(MetricsMiddleware, slow_request_ms=settings.SLOW_REQUEST_MS)
+
 app.include_router(user_router, prefix="/users")
 app.include_router(diary_router, prefix="/diarys")
+if settings.PROFILING_ENABLED:
+    app.include_router(profiling_router, prefix="/profiles")
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # Prometheus 스크레이프용 텍스트 형식
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,244 @@
+import argparse
+import asyncio
+import os
+import time
+
+from database.connection import AsyncSessionLocal, async_engine, conn
+from models.users import User  # Diary.user 관계 매핑에 필요
+
+
+# 검색 색인 전체 재생성
+async def rebuild_search(args):
+    from utils.search import rebuild_index
+
+    async with AsyncSessionLocal() as session:
+        count = await rebuild_index(session, chunk_size=args.chunk_size)
+    print(f"검색 색인 재생성 완료: 일기 {count}개")
+
+
+class RateLimiter:
+    """초당 요청 수 상한 (간단한 간격 기반 리미터)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+            self._next = max(now, self._next) + self.interval
+
+
+def read_checkpoint(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return int(f.read().strip() or 0)
+
+
+def write_checkpoint(path: str, last_id: int):
+    with open(path, "w") as f:
+        f.write(str(last_id))
+
+
+# 감정 분석 일괄 (재)분석
+async def backfill_emotion(args):
+    from sqlalchemy import delete
+    from sqlmodel import select
+
+    from models.diarys import Diary
+    from models.emotion import EmotionJob
+    from utils.clova import analyze_emotion_async
+    from utils.emotion import classify_emotion
+    from utils.emotion_cache import emotion_cache
+    from utils.emotion_worker import emotion_worker
+
+    # 기본 모드는 emotion IS NULL 조건만으로 이어서 실행되므로 체크포인트를 쓰지 않음
+    # (체크포인트를 쓰면 Clova 장애 등으로 실패한 일기를 다음 실행에서 건너뛰게 됨)
+    use_checkpoint = args.rescore
+    last_id = read_checkpoint(args.checkpoint) if use_checkpoint and not args.restart else 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limiter = RateLimiter(args.rate)
+
+    async def analyze(diary_id: int, content: str):
+        async with semaphore:
+            await limiter.wait()
+            try:
+                if args.rescore:
+                    # 프롬프트 변경 후 재분석: 캐시를 건너뛰고 새 결과로 캐시도 갱신
+                    emotion = await analyze_emotion_async(content)
+                    await emotion_cache.set(content, emotion)
+                else:
+                    emotion = await classify_emotion(content)
+                return emotion
+            except Exception as e:
+                print(f"일기 {diary_id} 감정 분석 실패: {e}")
+                return None
+
+    processed = skipped = failed = 0
+    started = time.monotonic()
+    print(f"감정 분석 시작 (id > {last_id}, 동시 요청 {args.concurrency}, 초당 상한 {args.rate or '없음'})")
+    while True:
+        # id 기준 keyset 청크 조회: 메모리 사용량이 청크 크기로 고정되고 (재분석 모드는) 체크포인트에서 재개 가능
+        statement = select(Diary.id, Diary.content, Diary.user_id, Diary.diary_date, Diary.emotion).where(Diary.id > last_id, Diary.content != "")
+        if not args.rescore:
+            statement = statement.where(Diary.emotion == None)
+        statement = statement.order_by(Diary.id).limit(args.chunk_size)
+        async with AsyncSessionLocal() as session:
+            rows = (await session.exec(statement)).all()
+        if not rows:
+            break
+
+        results = await asyncio.gather(*[analyze(row.id, row.content) for row in rows])
+        analyzed = [(row, emotion) for row, emotion in zip(rows, results) if emotion]
+        saved_ids = []
+        if analyzed:
+            # 분석하는 동안 API 요청이나 감정 분석 워커가 같은 일기를 바꿨을 수 있으므로
+            # 워커와 같은 조건부 UPDATE로 저장 (본문이 그대로이고 이전 감정이 그대로일 때만, 통계 증감은 실제로 바꾼 행만)
+            async with AsyncSessionLocal() as session:
+                for row, emotion in analyzed:
+                    if await emotion_worker._save_emotion(session, row, row.content, emotion):
+                        saved_ids.append(row.id)
+                if saved_ids:
+                    # 같은 본문을 다시 분석할 대기 작업은 제거 (본문이 바뀐 일기는 저장되지 않으므로 작업이 유지됨)
+                    await session.exec(delete(EmotionJob).where(EmotionJob.diary_id.in_(saved_ids), EmotionJob.status == "pending"))
+                await session.commit()
+
+        last_id = rows[-1][0]
+        if use_checkpoint:
+            write_checkpoint(args.checkpoint, last_id)
+        processed += len(saved_ids)
+        skipped += len(analyzed) - len(saved_ids)
+        failed += len(rows) - len(analyzed)
+        elapsed = time.monotonic() - started
+        print(f"  ~id {last_id}: 성공 {processed}, 변경되어 건너뜀 {skipped}, 실패 {failed}, {processed / elapsed:.1f}건/초")
+
+    if use_checkpoint and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint) # 끝까지 처리했으므로 다음 재분석은 처음부터 시작
+    elapsed = time.monotonic() - started
+    print(f"감정 분석 완료: 성공 {processed}, 변경되어 건너뜀 {skipped}, 실패 {failed}, {elapsed:.1f}초 ({processed / elapsed if elapsed else 0:.1f}건/초)")
+
+
+# 감정 통계 롤업 재계산
+async def rebuild_stats(args):
+    from utils.emotion_stats import rebuild_emotion_stats
+
+    async with AsyncSessionLocal() as session:
+        count = await rebuild_emotion_stats(session, chunk_size=args.chunk_size)
+    print(f"감정 통계 재계산 완료: 일기 {count}개")
+
+
+# 썸네일/중간 크기 이미지가 없는 기존 일기의 파생본 생성
+async def generate_image_variants(args):
+    from sqlmodel import select
+    from models.diarys import Diary
+    from utils.images import generate_diary_image_variants, shutdown_executor
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def generate(row):
+        async with semaphore:
+            await generate_diary_image_variants(row.id, row.image)
+
+    last_id = 0
+    total = 0
+    try:
+        while True:
+            async with AsyncSessionLocal() as session:
+                rows = (await session.exec(
+                    select(Diary.id, Diary.image)
+                    .where(Diary.id > last_id, Diary.image != "", Diary.thumbnail.is_(None))
+                    .order_by(Diary.id)
+                    .limit(args.chunk_size)
+                )).all()
+            if not rows:
+                break
+            await asyncio.gather(*[generate(row) for row in rows])
+            last_id = rows[-1].id
+            total += len(rows)
+            print(f"  ~id {last_id}: {total}개 처리")
+    finally:
+        shutdown_executor()
+    print(f"이미지 파생본 생성 완료: 일기 {total}개")
+
+
+# NDJSON 파일에서 일기 가져오기
+async def import_diaries_file(args):
+    from utils.diary_io import import_diaries
+
+    async def lines():
+        with open(args.file, encoding="utf-8-sig") as f:
+            for line in f:
+                yield line
+
+    report = await import_diaries(args.user_id, lines(), chunk_size=args.chunk_size)
+    print(f"일기 가져오기 완료: 추가 {report['inserted']}, 중복 {report['duplicates']}, 오류 {report['invalid']}")
+    for error in report["errors"]:
+        print(f"  {error['line']}번째 줄: {error['error']}")
+
+
+# 스키마 변경 적용 (실제 작업은 모든 명령 실행 전에 conn()에서 수행)
+async def migrate(args):
+    if not args.schema_changes:
+        print("적용할 스키마 변경이 없습니다.")
+    for change in args.schema_changes:
+        print(f"  {change}")
+
+
+async def run(args):
+    from utils import clova
+
+    try:
+        await args.func(args)
+    finally:
+        await clova.close_client()
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SeSAC-Diary 관리 명령")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild_search_parser = subparsers.add_parser("rebuild-search", help="일기 검색 색인을 처음부터 다시 만듭니다.")
+    rebuild_search_parser.add_argument("--chunk-size", type=int, default=1000)
+    rebuild_search_parser.set_defaults(func=rebuild_search)
+
+    backfill_parser = subparsers.add_parser("backfill-emotion", help="감정이 비어 있는 일기를 일괄 분석합니다.")
+    backfill_parser.add_argument("--rescore", action="store_true", help="이미 분석된 일기까지 모두 다시 분석 (캐시 무시)")
+    backfill_parser.add_argument("--chunk-size", type=int, default=200)
+    backfill_parser.add_argument("--concurrency", type=int, default=5, help="동시에 보내는 Clova 요청 수")
+    backfill_parser.add_argument("--rate", type=float, default=0, help="초당 Clova 요청 수 상한 (0이면 제한 없음)")
+    backfill_parser.add_argument("--checkpoint", default=".emotion_rescore_checkpoint", help="--rescore 실행 중 마지막으로 처리한 일기 id를 기록하는 파일 (완료되면 삭제)")
+    backfill_parser.add_argument("--restart", action="store_true", help="--rescore 체크포인트를 무시하고 처음부터 시작")
+    backfill_parser.set_defaults(func=backfill_emotion)
+
+    rebuild_stats_parser = subparsers.add_parser("rebuild-stats", help="감정 통계 롤업을 일기 테이블에서 다시 계산합니다.")
+    rebuild_stats_parser.add_argument("--chunk-size", type=int, default=5000)
+    rebuild_stats_parser.set_defaults(func=rebuild_stats)
+
+    image_variants_parser = subparsers.add_parser("generate-image-variants", help="썸네일이 없는 일기의 이미지 파생본을 생성합니다.")
+    image_variants_parser.add_argument("--chunk-size", type=int, default=200)
+    image_variants_parser.add_argument("--concurrency", type=int, default=4, help="동시에 처리하는 이미지 수")
+    image_variants_parser.set_defaults(func=generate_image_variants)
+
+    import_parser = subparsers.add_parser("import-diaries", help="NDJSON 파일의 일기를 사용자 계정으로 가져옵니다.")
+    import_parser.add_argument("file", help="한 줄에 일기 하나씩 JSON으로 적힌 파일 (/diarys/export 결과)")
+    import_parser.add_argument("--user-id", type=int, required=True)
+    import_parser.add_argument("--chunk-size", type=int, default=500)
+    import_parser.set_defaults(func=import_diaries_file)
+
+    migrate_parser = subparsers.add_parser("migrate", help="기존 테이블에 새로 추가된 컬럼/인덱스를 반영합니다.")
+    migrate_parser.set_defaults(func=migrate)
+
+    args = parser.parse_args()
+    args.schema_changes = conn()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING, List, Optional
 from datetime import datetime, timedelta, date
-from sqlmodel import JSON, Column, Field, Relationship, SQLModel
+from sqlmodel import JSON, Column, Field, Index, Relationship, SQLModel
 
 # from models.users import User
 # from pydantic import BaseModel
@@ -8,17 +8,32 @@ from sqlmodel import JSON, Column, Field, Relationship, SQLModel
 if TYPE_CHECKING:
     from models.users import User
 
+# 사용자당 하루 한 개의 일기를 보장하는 유니크 인덱스 이름 (중복 오류 판별에 사용)
+DIARY_DATE_UNIQUE_INDEX = "uq_diary_user_id_diary_date"
+
 def korea_now():                                                        #캘린더
     return datetime.utcnow() + timedelta(hours=9)                       #캘린더
 
 
 class Diary(SQLModel, table=True):
+    # 피드 keyset 페이지네이션용 복합 인덱스 (created_at, id 내림차순 스캔)
+    __table_args__ = (
+        Index("ix_diary_created_at_id", "created_at", "id"),
+        Index("ix_diary_state_created_at_id", "state", "created_at", "id"),
+        Index("ix_diary_user_id_created_at_id", "user_id", "created_at", "id"),
+        # 사용자당 하루 한 개의 일기 (중복 체크를 제약 조건으로 처리, 캘린더 월 범위 조회에도 사용)
+        Index(DIARY_DATE_UNIQUE_INDEX, "user_id", "diary_date", unique=True),
+    )
+
     id: int = Field(default=None, primary_key=True)
     title: str
     content: str
     image: str
+    thumbnail: Optional[str] = None # 피드 카드용 썸네일 S3 키 (업로드 후 백그라운드에서 생성)
+    image_medium: Optional[str] = None # 상세 화면용 중간 크기 이미지 S3 키
     state: bool
     emotion: Optional[str] = None
+    emotion_status: Optional[str] = None # 감정 분석 상태: pending / done / failed
     user_id: Optional[int] = Field(default=None, foreign_key="user.id")
     user: Optional["User"] = Relationship(back_populates="diarys")
     created_at: datetime = Field(default_factory=korea_now, nullable=False) # 현재 시간으로 기본값 설정
@@ -38,9 +53,22 @@ class DiaryList(SQLModel):
     title: str
     content: str
     image: str
+    thumbnail: Optional[str] = None # 목록에서는 원본 대신 썸네일 사용 (생성 전이면 None)
     state: bool
     emotion: Optional[str] = None
+    emotion_status: Optional[str] = None
     created_at: datetime # datetime 타입으로 추가
     diary_date: date
     user_id: Optional[int] = None
-    username: Optional[str] = None # 작성자 이름 필드
\ No newline at end of file
+    username: Optional[str] = None # 작성자 이름 필드
+
+# 커서 페이지네이션 응답 모델 (limit 파라미터를 사용한 경우)
+class DiaryPage(SQLModel):
+    items: List[DiaryList]
+    next_cursor: Optional[str] = None # 다음 페이지가 없으면 None
+
+# 월간 캘린더 조회 시 반환하는 모델 (날짜 칸에 필요한 정보만)
+class DiaryCalendarItem(SQLModel):
+    id: int
+    diary_date: date
+    emotion: Optional[str] = None
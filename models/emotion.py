@@ -0,0 +1,40 @@
+from datetime import date, datetime
+from typing import Optional
+from sqlmodel import Field, SQLModel
+
+from models.diarys import korea_now
+
+
+# 감정 분석 작업 큐 (서버가 재시작되어도 작업이 유실되지 않도록 DB에 저장)
+class EmotionJob(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    diary_id: int = Field(foreign_key="diary.id", index=True)
+    status: str = Field(default="pending", index=True) # pending / running / failed
+    attempts: int = Field(default=0)
+    next_run_at: datetime = Field(default_factory=korea_now, index=True) # 재시도 시각 (백오프)
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=korea_now, nullable=False)
+
+
+# 감정 분석 결과 캐시 (정규화된 본문 해시 -> 감정)
+class EmotionCacheEntry(SQLModel, table=True):
+    content_hash: str = Field(primary_key=True, max_length=64) # sha256 hex
+    emotion: str
+    created_at: datetime = Field(default_factory=korea_now, nullable=False, index=True)
+
+
+# 감정 통계 롤업 (일/주/월 단위 감정별 일기 수)
+# 일기 생성/삭제/감정 분석 완료 시 증감으로 갱신되며, 대시보드는 이 테이블만 조회
+class EmotionStat(SQLModel, table=True):
+    user_id: int = Field(primary_key=True) # 0 이면 전체 사용자 합계
+    period: str = Field(primary_key=True, max_length=8) # day / week / month
+    period_start: date = Field(primary_key=True) # 주는 월요일, 월은 1일
+    emotion: str = Field(primary_key=True, max_length=16)
+    count: int = Field(default=0)
+
+
+# 감정 통계 조회 응답 모델
+class EmotionStatItem(SQLModel):
+    period_start: date
+    emotion: str
+    count: int
@@ -0,0 +1,9 @@
+from sqlmodel import Field, SQLModel
+
+
+# 일기 검색용 역색인 (문자 n-gram -> 일기)
+# 한국어는 띄어쓰기 기준 토큰화가 부정확하므로 단어 내부의 문자 bigram 단위로 색인합니다.
+class DiaryToken(SQLModel, table=True):
+    token: str = Field(primary_key=True, max_length=32)
+    diary_id: int = Field(primary_key=True, foreign_key="diary.id", index=True)
+    weight: int = Field(default=0) # 제목/본문 등장 빈도 기반 가중치
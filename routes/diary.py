@@ -1,18 +1,34 @@
 import json
-from typing import List, Optional
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Path, UploadFile, status, Body, Query
+from typing import List, Optional, Union
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, Path, Request, UploadFile, status, Body, Query
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 # from fastapi.responses import FileResponse # S3 사용으로 FileResponse는 주석 처리 또는 제거
-from sqlmodel import select, Session
-from pydantic import BaseModel # DiaryCreate 모델을 위해 추가
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select, or_, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from pydantic import BaseModel, Field # DiaryCreate 모델을 위해 추가
 from datetime import datetime, date # date 타입 사용을 위해 추가
+from calendar import monthrange
 
 from auth.authenticate import authenticate, get_current_user_role
-from database.connection import get_session
+from database.connection import AsyncSessionLocal, get_async_session
+from database.migrations import enforced_unique_indexes
+from database.replicas import get_read_session, is_replica_session
 
-from models.diarys import Diary, DiaryUpdate, DiaryList # DiaryList 모델이 username, user_id, state 필드를 포함해야 함
+from models.diarys import DIARY_DATE_UNIQUE_INDEX, Diary, DiaryUpdate, DiaryList, DiaryPage, DiaryCalendarItem # DiaryList 모델이 username, user_id, state 필드를 포함해야 함
 from models.users import User
-from utils.s3 import upload_file_to_s3, get_presigned_url, s3, BUCKET_NAME
-from utils.clova import analyze_emotion_async
+from models.emotion import EmotionJob, EmotionStat, EmotionStatItem
+from utils.s3 import upload_file_to_s3_async, get_presigned_url, get_presigned_download_url, s3_key_from_image, issued_s3_key, public_url, create_cleanup_task, delete_s3_objects, cleanup_tasks
+from utils.emotion_worker import emotion_worker, enqueue_emotion_job
+from utils.images import generate_diary_image_variants
+from utils.diary_io import import_diaries, iter_lines, stream_diaries
+from utils.emotion_cache import emotion_cache
+from utils.response_cache import cached_json_response, response_cache
+from utils.pagination import encode_cursor, decode_cursor
+from utils.search import index_diary, remove_diary, remove_diaries, search_diary_ids
+from utils.emotion_stats import GLOBAL_USER_ID, apply_emotion_change, apply_emotion_deltas, emotion_deltas
 
 # pathlib 모듈의 Path 클래스를 FilePath 이름으로 사용
 from pathlib import Path as FilePath
@@ -29,6 +45,42 @@ class DiaryCreate(BaseModel):
     image: Optional[str] = None # S3에 업로드된 경우 파일 키(경로) 또는 URL
     diary_date: date # YYYY-MM-DD 형식으로 받을 예정
 
+class PresignBatchRequest(BaseModel):
+    get: List[str] = Field(default_factory=list, max_length=100) # 다운로드 URL이 필요한 파일 키 목록
+    put: List[str] = Field(default_factory=list, max_length=100) # 업로드할 파일 확장자 목록
+
+# DiaryList 응답에 필요한 컬럼만 한 번의 쿼리로 조회 (작성자 이름은 User 조인)
+# ORM 객체 생성/지연 로딩/model_dump 없이 행을 바로 응답 모델 데이터로 사용
+def diary_list_statement():
+    return (
+        select(
+            Diary.id,
+            Diary.title,
+            Diary.content,
+            Diary.image,
+            Diary.thumbnail,
+            Diary.state,
+            Diary.emotion,
+            Diary.emotion_status,
+            Diary.created_at,
+            Diary.diary_date,
+            Diary.user_id,
+            func.coalesce(User.username, "알 수 없음").label("username"),
+        )
+        .select_from(Diary)
+        .join(User, Diary.user_id == User.id, isouter=True)
+    )
+
+def is_duplicate_diary_date(error: IntegrityError) -> bool:
+    # (user_id, diary_date) 유니크 인덱스 위반인지 확인 (NOT NULL 등 다른 제약 위반과 구분)
+    # MySQL: "Duplicate entry ... for key 'uq_diary_user_id_diary_date'"
+    # SQLite: "UNIQUE constraint failed: diary.user_id, diary.diary_date"
+    message = str(error.orig)
+    return DIARY_DATE_UNIQUE_INDEX in message or "diary.user_id, diary.diary_date" in message
+
+# 캐시에 저장할 응답을 response_model과 같은 형태의 JSON 바이트로 직렬화
+_diary_list_adapter = TypeAdapter(List[DiaryList])
+
 # --- API 엔드포인트 ---
 
 @diary_router.get("/presigned-url")
@@ -39,44 +91,151 @@ async def generate_presigned_url_for_upload(file_type: str, user_id: int = Depen
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Presigned URL 생성 실패: {str(e)}")
 
+@diary_router.post("/upload-image", summary="이미지를 서버 경유로 S3에 업로드")
+async def upload_image(file: UploadFile = File(...), user_id: int = Depends(authenticate)):
+    # 반환된 key를 일기 작성/수정 시 image 값으로 사용
+    try:
+        return await upload_file_to_s3_async(file)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"이미지 업로드 실패: {str(e)}")
+    finally:
+        await file.close()
+
 @diary_router.get("/download-url")
 async def generate_presigned_url_for_download(file_key: str, user_id: int = Depends(authenticate)):
     try:
-        url = s3.generate_presigned_url(
-            ClientMethod='get_object',
-            Params={
-                'Bucket': BUCKET_NAME,
-                'Key': file_key
-            },
-            ExpiresIn=3600  # 유효기간 1시간
-        )
+        url = get_presigned_download_url(file_key) # 유효기간 1시간, 만료 직전까지 재사용
         return {"download_url": url}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"다운로드 URL 생성 실패: {str(e)}")
 
+@diary_router.post("/presigned-urls", summary="여러 파일의 presigned URL을 한 번에 생성")
+async def generate_presigned_urls_batch(payload: PresignBatchRequest, user_id: int = Depends(authenticate)):
+    # 피드 한 페이지의 이미지 URL을 요청 한 번으로 발급 (다운로드 URL은 캐시 재사용)
+    try:
+        return {
+            "get": {key: get_presigned_download_url(key) for key in dict.fromkeys(payload.get)},
+            "put": [get_presigned_url(file_type) for file_type in payload.put],
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Presigned URL 생성 실패: {str(e)}")
+
 @diary_router.get("/check-duplicate", response_model=dict)
 async def check_duplicate_diary_exists(
     diary_date: date = Query(..., description="YYYY-MM-DD 형식의 날짜"),
     user_id: int = Depends(authenticate),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     statement = select(Diary).where(
         Diary.user_id == user_id,
         Diary.diary_date == diary_date
     )
-    existing_diary = session.exec(statement).first()
+    existing_diary = (await session.exec(statement)).first()
     if existing_diary:
         return {"exists": True}
     return {"exists": False}
 
-@diary_router.get("/", response_model=List[DiaryList])
+@diary_router.get("/calendar", response_model=List[DiaryCalendarItem])
+async def retrieve_calendar(
+    year: int = Query(..., ge=1, le=9999),
+    month: int = Query(..., ge=1, le=12),
+    user_id: int = Depends(authenticate),
+    session: AsyncSession = Depends(get_read_session)
+):
+    """
+    로그인한 사용자의 한 달치 일기 (날짜, id, 감정)를 반환합니다.
+    (user_id, diary_date) 인덱스 범위 스캔 한 번으로 캘린더 전체를 채웁니다.
+    """
+    first_day = date(year, month, 1)
+    last_day = date(year, month, monthrange(year, month)[1])
+    statement = (
+        select(Diary.id, Diary.diary_date, Diary.emotion)
+        .where(Diary.user_id == user_id, Diary.diary_date >= first_day, Diary.diary_date <= last_day)
+        .order_by(Diary.diary_date)
+    )
+    return [dict(row._mapping) for row in (await session.exec(statement)).all()]
+
+@diary_router.get("/stats/emotions", response_model=List[EmotionStatItem], summary="기간별 감정 통계")
+async def retrieve_emotion_stats(
+    period: str = Query("month", pattern="^(day|week|month)$"),
+    scope: str = Query("me", pattern="^(me|global)$", description="me: 내 일기, global: 전체 사용자"),
+    start: Optional[date] = Query(None, description="조회 시작 날짜 (기간 시작일 기준)"),
+    end: Optional[date] = Query(None, description="조회 종료 날짜"),
+    user_id: int = Depends(authenticate),
+    session: AsyncSession = Depends(get_read_session)
+):
+    # 롤업 테이블만 조회 (일기 테이블 GROUP BY 없음)
+    statement = select(EmotionStat.period_start, EmotionStat.emotion, EmotionStat.count).where(
+        EmotionStat.user_id == (user_id if scope == "me" else GLOBAL_USER_ID),
+        EmotionStat.period == period,
+        EmotionStat.count > 0,
+    )
+    if start:
+        statement = statement.where(EmotionStat.period_start >= start)
+    if end:
+        statement = statement.where(EmotionStat.period_start <= end)
+    statement = statement.order_by(EmotionStat.period_start, EmotionStat.emotion)
+    return [dict(row._mapping) for row in (await session.exec(statement)).all()]
+
+@diary_router.get("/emotion/cache-stats", summary="감정 분석 캐시 적중률 조회 (관리자)")
+async def get_emotion_cache_stats(user_role: str = Depends(get_current_user_role)):
+    if user_role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="관리자만 조회할 수 있습니다.")
+    return emotion_cache.stats()
+
+@diary_router.get("/export", summary="일기 내보내기 (NDJSON/CSV 스트리밍)")
+async def export_diaries(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    all_users: bool = Query(False, description="관리자 전용: 전체 사용자의 일기 내보내기"),
+    user_id: int = Depends(authenticate),
+    user_role: Optional[str] = Depends(get_current_user_role)
+):
+    if all_users and user_role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="관리자만 전체 일기를 내보낼 수 있습니다.")
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_diaries(None if all_users else user_id, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="diaries.{format}"'},
+    )
+
+@diary_router.post("/import", summary="일기 가져오기 (NDJSON 파일)")
+async def import_diary_file(
+    file: UploadFile = File(...),
+    user_id: int = Depends(authenticate)
+):
+    async def chunks():
+        while chunk := await file.read(64 * 1024):
+            yield chunk
+
+    try:
+        report = await import_diaries(user_id, iter_lines(chunks()))
+    finally:
+        await file.close()
+    if report["inserted"]:
+        emotion_worker.notify() # 감정이 없는 일기는 분석 작업으로 등록됨
+    if report["public"]:
+        response_cache.invalidate_feed()
+    return report
+
+@diary_router.get("/", response_model=Union[DiaryPage, List[DiaryList]])
 async def retrieve_all_diaries(
-    session: Session = Depends(get_session),
+    request: Request,
+    session: AsyncSession = Depends(get_read_session),
     state: Optional[bool] = None,
+    limit: Optional[int] = Query(None, ge=1, le=100, description="지정하면 커서 페이지네이션 모드로 동작"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor 값"),
     current_user_id: Optional[int] = Depends(authenticate), # authenticate가 None을 반환할 수 있도록 authenticate 수정 필요 또는 별도 의존성 사용
     user_role: Optional[str] = Depends(get_current_user_role)
 ):
-    statement = select(Diary).join(User, isouter=True).order_by(Diary.created_at.desc()) # User 정보를 함께 가져오기 위함
+    # 공개 피드(state=True)는 누가 요청해도 같은 결과이므로 직렬화된 응답을 캐시
+    cache_key = ("feed", limit, cursor) if state is True else None
+    if cache_key:
+        cached = response_cache.get(cache_key)
+        if cached:
+            return cached_json_response(request, cached)
+
+    statement = diary_list_statement().order_by(Diary.created_at.desc(), Diary.id.desc())
     
     is_admin = (user_role == "admin")
 
@@ -91,7 +250,7 @@ async def retrieve_all_diaries(
                 statement = statement.where(Diary.user_id == current_user_id)
             else:
                 # 로그인하지 않은 경우 비공개 일기는 볼 수 없습니다.
-                return []
+                return {"items": [], "next_cursor": None} if limit else []
         # state=True (공개 일기)인 경우, 누구나 볼 수 있으므로 추가 필터링이 필요 없습니다.
     else:
         # state 파라미터가 없을 때 (전체 목록, 기본 필터링)
@@ -118,35 +277,61 @@ async def retrieve_all_diaries(
     #         # 로그인하지 않은 사용자: 모든 공개 일기
     #         statement = statement.where(Diary.state == True)
     
-    diary_results = session.exec(statement).unique().all()
-    
-    response_diaries = []
-    for diary in diary_results:
-        diary_data = diary.model_dump() # Diary 모델의 데이터
-        # DiaryList에 필요한 추가 정보 (username, user_id, state)
-        diary_data["username"] = diary.user.username if diary.user else "알 수 없음"
-        diary_data["user_id"] = diary.user_id
-        # diary_data["state"] = diary.state # 이미 model_dump에 포함되어 있을 것임 (Diary 모델 필드라면)
-        
-        # DiaryList 모델에 맞게 response_diaries에 추가
-        # 이 부분은 DiaryList 모델의 정의에 따라 조정될 수 있습니다.
-        # 예를 들어, DiaryList가 Diary 모델을 상속하고 username만 추가한다면:
-        # response_diaries.append(DiaryList(**diary_data, username=diary_data["username"]))
-        # 현재 코드에서는 DiaryList가 모든 필드를 직접 받는다고 가정합니다.
-        response_diaries.append(DiaryList(**diary_data))
-        
+    if limit:
+        # keyset 페이지네이션: 마지막으로 본 (created_at, id) 이후의 행만 인덱스로 스캔
+        after = decode_cursor(cursor)
+        if after:
+            last_created_at, last_id = after
+            statement = statement.where(
+                or_(
+                    Diary.created_at < last_created_at,
+                    (Diary.created_at == last_created_at) & (Diary.id < last_id),
+                )
+            )
+        # 다음 페이지 존재 여부 확인을 위해 하나 더 조회
+        statement = statement.limit(limit + 1)
+
+    if cache_key and is_replica_session(session):
+        # 캐시에 저장할 공개 피드는 기본 DB에서 조회 (복제 지연된 결과가 다음 쓰기까지 캐시에 남지 않도록)
+        async with AsyncSessionLocal() as primary_session:
+            rows = (await primary_session.exec(statement)).all()
+    else:
+        rows = (await session.exec(statement)).all()
+    response_diaries = [dict(row._mapping) for row in rows]
+
+    if limit:
+        next_cursor = None
+        if len(response_diaries) > limit:
+            response_diaries = response_diaries[:limit]
+            last = response_diaries[-1]
+            next_cursor = encode_cursor(last["created_at"], last["id"])
+        result = {"items": response_diaries, "next_cursor": next_cursor}
+        if cache_key:
+            body = DiaryPage.model_validate(result).model_dump_json().encode("utf-8")
+            return cached_json_response(request, response_cache.set(cache_key, body))
+        return result
+
+    if cache_key:
+        body = _diary_list_adapter.dump_json(_diary_list_adapter.validate_python(response_diaries))
+        return cached_json_response(request, response_cache.set(cache_key, body))
     return response_diaries
 
 @diary_router.get("/{diary_id}", response_model=DiaryList)
 async def retrieve_diary(
     diary_id: int,
-    session: Session = Depends(get_session),
+    request: Request,
+    session: AsyncSession = Depends(get_read_session),
     current_user_id: Optional[int] = Depends(authenticate), # 위와 동일하게 Optional 처리
     user_role: Optional[str] = Depends(get_current_user_role)
 ):
-    # join(User)를 사용하여 작성자 정보도 함께 로드
-    statement = select(Diary).where(Diary.id == diary_id).join(User, isouter=True)
-    diary = session.exec(statement).first()
+    # 공개 일기 상세는 캐시에서 바로 응답 (DB 조회 없음)
+    cached = response_cache.get(("diary", diary_id))
+    if cached:
+        return cached_json_response(request, cached)
+
+    # 작성자 이름까지 한 번의 쿼리로 조회
+    statement = diary_list_statement().where(Diary.id == diary_id)
+    diary = (await session.exec(statement)).first()
 
     if not diary:
         raise HTTPException(
@@ -164,53 +349,61 @@ async def retrieve_diary(
                 detail="이 일기에 접근할 권한이 없습니다."
             )
             
-    diary_data = diary.model_dump()
-    diary_data["username"] = diary.user.username if diary.user else "알 수 없음"
-    # user_id, state는 diary.model_dump()에 이미 포함되어 있다고 가정 (Diary 모델의 필드)
-    
-    return DiaryList(**diary_data)
+    if diary.state and not is_replica_session(session):
+        # 복제본에서 읽은 상세는 쓰기 이전 데이터일 수 있으므로 캐시하지 않음
+        body = DiaryList.model_validate(dict(diary._mapping)).model_dump_json().encode("utf-8")
+        return cached_json_response(request, response_cache.set(("diary", diary_id), body))
+    return dict(diary._mapping)
 
 @diary_router.post("/", status_code=status.HTTP_201_CREATED, response_model=Diary) # 반환 타입을 Diary로 명시 (또는 DiaryList)
 async def create_diary(
     payload: DiaryCreate, # Pydantic 모델로 요청 본문 받기
+    background_tasks: BackgroundTasks,
     user_id: int = Depends(authenticate),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
-    # 중복 체크: 같은 날짜에 같은 사용자가 이미 쓴 일기 있는지 확인
-    statement = select(Diary).where(
-        Diary.user_id == user_id,
-        Diary.diary_date == payload.diary_date
-    )
-    existing_diary = session.exec(statement).first()
-
-    if existing_diary:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT, # 400 대신 409 Conflict가 더 적절할 수 있음
-            detail="같은 날짜에 이미 작성한 일기가 있습니다."
-        )
-
     # Diary 객체 생성 준비
     diary_data = payload.model_dump()
     diary_data["user_id"] = user_id
+    diary_data["image"] = payload.image or "" # image 컬럼은 NOT NULL (이미지 없음은 빈 문자열)
     
-    # 감정 분석 (content가 비어있지 않을 때만 수행)
-    if payload.content:
-        try:
-            emotion = await analyze_emotion_async(payload.content)
-            diary_data["emotion"] = emotion
-        except Exception as e:
-            # 감정 분석 실패 시 로깅하고 계속 진행하거나, 오류 처리 (여기서는 일단 None으로 둘 수 있음)
-            print(f"감정 분석 실패: {e}")
-            diary_data["emotion"] = None # 또는 기본값
-    else:
-        diary_data["emotion"] = None
+    # 감정 분석은 저장 후 백그라운드 워커가 수행 (요청 응답 시간에서 Clova 호출 제외)
+    diary_data["emotion"] = None
 
+    duplicate_error = HTTPException(
+        status_code=status.HTTP_409_CONFLICT, # 400 대신 409 Conflict가 더 적절할 수 있음
+        detail="같은 날짜에 이미 작성한 일기가 있습니다."
+    )
+    if DIARY_DATE_UNIQUE_INDEX not in enforced_unique_indexes:
+        # 기존 데이터의 중복 때문에 유니크 인덱스를 만들지 못한 DB에서는 직접 확인
+        existing = (await session.exec(
+            select(Diary.id).where(Diary.user_id == user_id, Diary.diary_date == payload.diary_date)
+        )).first()
+        if existing:
+            raise duplicate_error
 
     new_diary = Diary(**diary_data)
     
     session.add(new_diary)
-    session.commit()
-    session.refresh(new_diary)
+    try:
+        await session.flush() # id 할당 후 같은 트랜잭션에서 검색 색인 작성
+    except IntegrityError as e:
+        await session.rollback()
+        if is_duplicate_diary_date(e):
+            # (user_id, diary_date) 유니크 인덱스 위반: 같은 날짜에 이미 작성한 일기가 있음
+            raise duplicate_error
+        raise
+    await index_diary(session, new_diary)
+    if new_diary.content:
+        await enqueue_emotion_job(session, new_diary)
+    await session.commit()
+    await session.refresh(new_diary)
+    emotion_worker.notify()
+    if new_diary.state:
+        response_cache.invalidate_feed()
+    if new_diary.image:
+        # 피드용 썸네일/중간 크기 이미지는 응답 후 프로세스 풀에서 생성
+        background_tasks.add_task(generate_diary_image_variants, new_diary.id, new_diary.image)
 
     return new_diary # 생성된 Diary 객체 반환
 
@@ -218,11 +411,12 @@ async def create_diary(
 async def update_diary_entry( # 함수 이름 변경 (PEP8, CRUD 느낌 살려서)
     diary_id: int,
     payload: DiaryUpdate, # DiaryUpdate 모델은 title, content, state 등 변경 가능한 필드만 포함해야 함
+    background_tasks: BackgroundTasks,
     user_id: int = Depends(authenticate),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user_role: str = Depends(get_current_user_role)
 ):
-    diary = session.get(Diary, diary_id)
+    diary = await session.get(Diary, diary_id)
     if not diary:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -235,36 +429,47 @@ async def update_diary_entry( # 함수 이름 변경 (PEP8, CRUD 느낌 살려
             detail="이 일기를 수정할 권한이 없습니다."
         )
 
+    was_public = diary.state
     diary_update_data = payload.model_dump(exclude_unset=True) # 값이 제공된 필드만 업데이트
+    image_changed = 'image' in diary_update_data and diary_update_data['image'] != diary.image
 
     for key, value in diary_update_data.items():
         setattr(diary, key, value)
-
-    # 내용이 수정되었다면 감정 재분석
-    if 'content' in diary_update_data and diary.content:
-        try:
-            emotion = await analyze_emotion_async(diary.content)
-            diary.emotion = emotion
-        except Exception as e:
-            print(f"감정 재분석 실패: {e}")
-            # 오류 발생 시 이전 감정 유지 또는 기본값 설정
+    if image_changed:
+        # 이전 이미지의 파생본은 더 이상 맞지 않으므로 새로 생성될 때까지 비움
+        diary.thumbnail = None
+        diary.image_medium = None
+
+    # 내용이 수정되었다면 감정 재분석 작업 등록 (분석 완료 전까지 이전 감정 유지)
+    content_changed = 'content' in diary_update_data and bool(diary.content)
+    if content_changed:
+        await enqueue_emotion_job(session, diary)
             
     # diary_date가 변경되는 경우는 중복 체크를 다시 해야 할 수도 있으나,
     # DiaryUpdate 모델에 diary_date를 포함하지 않거나, 포함 시 별도 로직 필요
 
     session.add(diary)
-    session.commit()
-    session.refresh(diary)
+    if 'title' in diary_update_data or 'content' in diary_update_data:
+        await index_diary(session, diary) # 제목/내용이 바뀐 경우에만 검색 색인 갱신
+    await session.commit()
+    await session.refresh(diary)
+    if content_changed:
+        emotion_worker.notify()
+    if was_public or diary.state:
+        response_cache.invalidate_public_diary(diary.id)
+    if image_changed and diary.image:
+        background_tasks.add_task(generate_diary_image_variants, diary.id, diary.image)
     return diary
 
 @diary_router.delete("/{diary_id}", status_code=status.HTTP_204_NO_CONTENT) # 성공 시 204 No Content 반환
 async def delete_diary_entry( # 함수 이름 변경
     diary_id: int,
     user_id: int = Depends(authenticate),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user_role: str = Depends(get_current_user_role)
 ):
-    diary = session.get(Diary, diary_id)
+    # 감정 분석 워커가 동시에 감정을 바꾸지 못하도록 행을 잠근 뒤 통계 차감
+    diary = await session.get(Diary, diary_id, with_for_update=True)
     if not diary:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -277,31 +482,101 @@ async def delete_diary_entry( # 함수 이름 변경
             detail="이 일기를 삭제할 권한이 없습니다."
         )
         
-    session.delete(diary)
-    session.commit()
+    await remove_diary(session, diary.id)
+    await session.exec(delete(EmotionJob).where(EmotionJob.diary_id == diary.id))
+    await apply_emotion_change(session, diary.user_id, diary.diary_date, diary.emotion, None) # 감정 통계 차감
+    await session.delete(diary)
+    await session.commit()
+    if diary.state:
+        response_cache.invalidate_public_diary(diary.id)
     # 204 No Content는 본문을 반환하지 않으므로 return 문 없음
     # return {"message": "일기장 삭제가 완료되었습니다."} # 대신 status_code=204 사용
 
+# 대량 삭제 시 한 트랜잭션에서 처리하는 일기 수
+DELETE_CHUNK_SIZE = 1000
+
 @diary_router.delete("/", summary="모든 일기 삭제 (주의 요망!)")
 async def delete_all_user_diaries( # 함수 이름 구체화, 현재는 특정 사용자 일기만 삭제하도록 변경
+    background_tasks: BackgroundTasks,
     user_id: int = Depends(authenticate), # 관리자 기능이 아니라면 해당 사용자 일기만 삭제
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     # 주의: 이 작업은 해당 사용자의 모든 일기를 삭제합니다.
     # 만약 '모든 사용자'의 모든 일기를 삭제하는 기능이라면 별도의 관리자 권한 확인이 필요합니다.
-    
-    statement = select(Diary).where(Diary.user_id == user_id)
-    diaries_to_delete = session.exec(statement).all()
-    
-    if not diaries_to_delete:
+
+    # ORM 객체를 하나씩 지우지 않고 id 청크 단위로 DELETE ... WHERE id IN (...) 실행
+    deleted = 0
+    last_id = 0
+    candidates = {} # 정리 후보 S3 키 (서버가 발급한 키만, 순서 유지)
+    public_ids = []
+    while True:
+        rows = (await session.exec(
+            select(Diary.id, Diary.image, Diary.thumbnail, Diary.image_medium, Diary.state, Diary.diary_date, Diary.emotion)
+            .where(Diary.user_id == user_id, Diary.id > last_id)
+            .order_by(Diary.id)
+            .limit(DELETE_CHUNK_SIZE)
+            .with_for_update() # 통계 차감에 쓰는 감정 값이 삭제 전까지 바뀌지 않도록 잠금
+        )).all()
+        if not rows:
+            break
+
+        diary_ids = [row.id for row in rows]
+        await remove_diaries(session, diary_ids)
+        await session.exec(delete(EmotionJob).where(EmotionJob.diary_id.in_(diary_ids)))
+        await apply_emotion_deltas(session, emotion_deltas((user_id, row.diary_date, row.emotion, None) for row in rows))
+        await session.exec(delete(Diary).where(Diary.id.in_(diary_ids)))
+        await session.commit()
+
+        deleted += len(rows)
+        last_id = diary_ids[-1]
+        for row in rows:
+            # image는 클라이언트가 보낸 임의의 문자열이므로 서버가 발급한 형식의 키만 후보로 사용
+            for value in (row.image, row.thumbnail, row.image_medium):
+                key = issued_s3_key(value)
+                if key:
+                    candidates[key] = None
+        public_ids.extend(row.id for row in rows if row.state)
+
+    if not deleted:
         # raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="삭제할 일기가 없습니다.")
         return {"message": "삭제할 일기가 없습니다."} # 또는 204
 
-    for diary in diaries_to_delete:
-        session.delete(diary)
-    
-    session.commit()
-    return {"message": f"사용자 ID {user_id}의 일기 {len(diaries_to_delete)}개가 삭제되었습니다."}
+    for diary_id in public_ids:
+        response_cache.invalidate_public_diary(diary_id)
+
+    # 다른 일기가 아직 참조하는 객체(원본/썸네일/중간 크기 어느 컬럼이든)는 제외하고 S3 객체를 백그라운드에서 정리
+    cleanup_task_id = None
+    if candidates:
+        still_used = set()
+        candidate_list = list(candidates)
+        for i in range(0, len(candidate_list), DELETE_CHUNK_SIZE):
+            chunk = candidate_list[i:i + DELETE_CHUNK_SIZE]
+            image_values = chunk + [public_url(key) for key in chunk] # image에는 키 또는 공개 URL이 저장됨
+            rows = (await session.exec(
+                select(Diary.image, Diary.thumbnail, Diary.image_medium).where(or_(
+                    Diary.image.in_(image_values),
+                    Diary.thumbnail.in_(chunk),
+                    Diary.image_medium.in_(chunk),
+                ))
+            )).all()
+            still_used.update(s3_key_from_image(value) for row in rows for value in row if value)
+        keys = [key for key in candidate_list if key not in still_used]
+        if keys:
+            cleanup_task_id = create_cleanup_task(keys)
+            background_tasks.add_task(delete_s3_objects, keys, cleanup_task_id)
+
+    return {
+        "message": f"사용자 ID {user_id}의 일기 {deleted}개가 삭제되었습니다.",
+        "cleanup_task_id": cleanup_task_id, # /diarys/cleanup/{task_id} 로 이미지 삭제 진행 상황 조회
+    }
+
+
+@diary_router.get("/cleanup/{task_id}", summary="S3 이미지 정리 진행 상황 조회")
+async def get_cleanup_status(task_id: str, user_id: int = Depends(authenticate)):
+    progress = cleanup_tasks.get(task_id)
+    if not progress:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="정리 작업을 찾을 수 없습니다.")
+    return progress
 
 
 # S3 연동을 가정하고, 로컬 파일 직접 다운로드 대신 Presigned URL 생성 방식으로 변경
@@ -309,9 +584,9 @@ async def delete_all_user_diaries( # 함수 이름 구체화, 현재는 특정 
 async def get_s3_image_download_url(
     diary_id: int,
     user_id: int = Depends(authenticate), # 접근 권한 확인용
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
-    diary = session.get(Diary, diary_id)
+    diary = await session.get(Diary, diary_id)
     if not diary:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="일기를 찾을 수 없습니다.")
 
@@ -323,11 +598,7 @@ async def get_s3_image_download_url(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="이미지 파일 키를 찾을 수 없습니다.")
 
     try:
-        url = s3.generate_presigned_url(
-            ClientMethod='get_object',
-            Params={'Bucket': BUCKET_NAME, 'Key': diary.image},
-            ExpiresIn=3600  # 1시간 동안 유효한 URL
-        )
+        url = get_presigned_download_url(diary.image) # 1시간 동안 유효한 URL (만료 직전까지 재사용)
         return {"download_url": url, "file_key": diary.image}
     except Exception as e:
         # 실제 운영 환경에서는 에러 로깅 권장
@@ -336,31 +607,22 @@ async def get_s3_image_download_url(
 
 @diary_router.get("/list/search", response_model=List[DiaryList])
 async def search_diarys(
-        session: Session = Depends(get_session),
+        session: AsyncSession = Depends(get_read_session),
         search: Optional[str] = None,  # 검색어
-) -> List[DiaryList]:
+        limit: int = Query(20, ge=1, le=100),
+        offset: int = Query(0, ge=0),
+):
 
     if not search:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="검색어를 입력해주세요.")
-    
-    statement = select(Diary).join(User, isouter=True)
-
-    # 공개된 글만 조회 (state=1)
-    statement = statement.where(Diary.state == 1)  # 공개된 글만
-
-    # 검색어가 있을 경우 제목을 필터링
-    if search:
-        statement = statement.where(Diary.title.ilike(f"%{search}%"))
-
-    diary_results = session.exec(statement).unique().all()
 
-    response_diarys = []
-    for diary in diary_results:
-        diary_data = diary.model_dump()
-        diary_data["username"] = diary.user.username if diary.user else "알 수 없음"
-        diary_data["user_id"] = diary.user_id
-        diary_data["state"] = diary.state
-        response_diarys.append(DiaryList(**diary_data))
+    # n-gram 역색인에서 공개 일기 id를 점수 순으로 조회 (제목 + 내용)
+    ranked_ids = [diary_id for diary_id, _ in await search_diary_ids(session, search, limit, offset)]
+    if not ranked_ids:
+        return []
 
-    return response_diarys
+    statement = diary_list_statement().where(Diary.id.in_(ranked_ids))
+    diary_by_id = {row.id: dict(row._mapping) for row in (await session.exec(statement)).all()}
 
+    # 검색 점수 순서 유지
+    return [diary_by_id[diary_id] for diary_id in ranked_ids if diary_id in diary_by_id]
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import PlainTextResponse
+
+from auth.authenticate import get_current_user_role
+from utils.profiling import profile_store, render_collapsed, render_pstats, render_text
+
+profiling_router = APIRouter(tags=["Profiling"])
+
+
+@profiling_router.get("/", summary="저장된 프로파일 목록 (관리자)")
+async def list_profiles(user_role: str = Depends(get_current_user_role)):
+    if user_role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="관리자만 조회할 수 있습니다.")
+    return profile_store.list()
+
+
+@profiling_router.get("/{profile_id}", summary="프로파일 결과 조회 (관리자)")
+async def get_profile(
+    profile_id: str,
+    format: str = Query("text", pattern="^(text|pstats|collapsed)$"),
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|ncalls)$"),
+    limit: int = Query(50, ge=1, le=1000),
+    user_role: str = Depends(get_current_user_role)
+):
+    if user_role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="관리자만 조회할 수 있습니다.")
+    result = profile_store.get(profile_id)
+    if not result:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="프로파일 결과를 찾을 수 없습니다.")
+    if format == "pstats":
+        # python -m pstats / snakeviz 로 열 수 있는 파일
+        return Response(
+            render_pstats(result),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.pstats"'},
+        )
+    if format == "collapsed":
+        return PlainTextResponse(render_collapsed(result))
+    return PlainTextResponse(render_text(result, sort=sort, limit=limit))
+
+
+@profiling_router.delete("/", status_code=status.HTTP_204_NO_CONTENT, summary="저장된 프로파일 삭제 (관리자)")
+async def clear_profiles(user_role: str = Depends(get_current_user_role)):
+    if user_role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="관리자만 조회할 수 있습니다.")
+    profile_store.clear()
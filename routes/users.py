@@ -2,9 +2,13 @@ from fastapi import APIRouter, Depends, HTTPException, status,Request
 from fastapi.responses import JSONResponse, RedirectResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from auth.hash_password import HashPassword
 from auth.jwt_handler import create_jwt_token
-from database.connection import get_session
+from auth.authenticate import get_current_user_role
+from auth.user_cache import user_cache
+from database.connection import get_async_session
+from database.replicas import get_read_session
 from models.users import User, UserSignIn, UserSignUp
 from utils.oauth import oauth
 import os
@@ -26,7 +30,7 @@ async def google_login(request: Request):
 
 # 구글 OAuth 인증 후 콜백
 @user_router.get("/google/callback")
-async def google_callback(request: Request, session=Depends(get_session)):
+async def google_callback(request: Request, session: AsyncSession = Depends(get_async_session)):
     token = await oauth.google.authorize_access_token(request)
     userinfo = token.get("userinfo")
     if not userinfo:
@@ -34,7 +38,7 @@ async def google_callback(request: Request, session=Depends(get_session)):
 
     # 1. DB에서 사용자 조회 또는 생성
     statement = select(User).where(User.email == userinfo["email"])
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
     if not user:
         user = User(
             email=userinfo["email"],
@@ -45,8 +49,8 @@ async def google_callback(request: Request, session=Depends(get_session)):
             diarys=[]
         )
         session.add(user)
-        session.commit()
-        session.refresh(user)
+        await session.commit()
+        await session.refresh(user)
 
     # 2. JWT 발급
     jwt_token = create_jwt_token(user.email, user.id, user.role)
@@ -57,9 +61,9 @@ async def google_callback(request: Request, session=Depends(get_session)):
 
 # 회원 가입(등록)
 @user_router.post("/signup", status_code=status.HTTP_201_CREATED)
-async def sign_new_user(data: UserSignUp, session = Depends(get_session)) -> dict:
+async def sign_new_user(data: UserSignUp, session: AsyncSession = Depends(get_async_session)) -> dict:
     statement = select(User).where(User.email == data.email)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
     if user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -67,14 +71,14 @@ async def sign_new_user(data: UserSignUp, session = Depends(get_session)) -> dic
     
     new_user = User(
         email=data.email,
-        password=hash_password.hash_password(data.password),
+        password=await hash_password.hash_password_async(data.password),
         username=data.username,
         role=data.role,
         diarys=[]
     )
     session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
+    await session.commit()
+    await session.refresh(new_user)
     return {
         "message": "사용자 등록이 완료되었습니다.",
         "user": new_user
@@ -82,19 +86,27 @@ async def sign_new_user(data: UserSignUp, session = Depends(get_session)) -> dic
 
 # 로그인
 @user_router.post("/signin")
-async def sign_in(data: OAuth2PasswordRequestForm = Depends(), session = Depends(get_session)) -> dict:
+async def sign_in(data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_async_session)) -> dict:
     statement = select(User).where(User.email == data.username)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="사용자를 찾을 수 없습니다.")    
 
     # if user.password != data.password:
-    if hash_password.verify_password(data.password, user.password) == False:
+    verified, new_hash = await hash_password.verify_and_update_async(data.password, user.password)
+    if verified == False:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
             detail="패스워드가 일치하지 않습니다.")
+
+    if new_hash:
+        # bcrypt cost 설정이 바뀐 경우 로그인 시점에 새 cost로 재해시
+        user.password = new_hash
+        session.add(user)
+        await session.commit()
+        user_cache.invalidate(user.id)
     
     return {
         "message": "로그인에 성공했습니다.",
@@ -111,9 +123,9 @@ async def sign_in(data: OAuth2PasswordRequestForm = Depends(), session = Depends
     # )
 
 @user_router.get("/checkemail/{email}", response_model=dict)
-async def check_email(email: str, session = Depends(get_session)):
+async def check_email(email: str, session: AsyncSession = Depends(get_read_session)):
     statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
     if user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -123,12 +135,19 @@ async def check_email(email: str, session = Depends(get_session)):
 
 
 @user_router.get("/checkusername/{username}")
-async def check_nickname(username: str, session = Depends(get_session)):
+async def check_nickname(username: str, session: AsyncSession = Depends(get_read_session)):
     statement = select(User).where(User.username == username)  
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
     if user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="이미 등록된 닉네임입니다."
         )
-    return {"message": "Username available"}
\ No newline at end of file
+    return {"message": "Username available"}
+
+
+@user_router.get("/hash-stats", summary="비밀번호 해시 작업 대기열 조회 (관리자)")
+async def get_hash_stats(user_role: str = Depends(get_current_user_role)):
+    if user_role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="관리자만 조회할 수 있습니다.")
+    return hash_password.stats()
@@ -0,0 +1,109 @@
+"""
+일기 목록/상세/검색 API가 일기 수와 관계없이 요청당 같은 수의 SQL만 실행하는지 확인합니다. (N+1 회귀 방지)
+임시 SQLite 파일에 일기를 N개, 2N개 넣고 요청별 실행된 SQL 수를 비교합니다.
+"""
+import asyncio
+import os
+import tempfile
+from datetime import date, timedelta
+
+# 애플리케이션 모듈을 불러오기 전에 설정 (database.connection이 import 시점에 엔진을 생성)
+_tmpdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/test.db"
+os.environ["ASYNC_DATABASE_URL"] = ""
+os.environ["READ_REPLICA_URLS"] = ""
+for _key in ("SECRET_KEY", "aws_access_key", "aws_secret_key", "aws_s3_bucket", "aws_region",
+             "GOOGLE_CLIENT_ID", "GOOGLE_CLIENT_SECRET", "GOOGLE_REDIRECT_URI", "clova_api_key"):
+    os.environ.setdefault(_key, "test")
+
+import httpx
+import pytest
+from sqlalchemy import event, insert
+
+from auth.jwt_handler import create_jwt_token
+from database.connection import AsyncSessionLocal, async_engine, conn
+from main import app
+from models.diarys import Diary
+from models.users import User
+from utils.response_cache import response_cache
+from utils.search import rebuild_index
+
+N = 50
+USERS = 5
+
+
+async def _seed(start: int, count: int):
+    async with async_engine.begin() as connection:
+        await connection.execute(insert(Diary), [
+            {
+                "title": f"일기 {i}",
+                "content": f"오늘은 산책을 했다 {i}",
+                "image": "",
+                "state": i % 2 == 0,
+                "user_id": i % USERS + 1,
+                "diary_date": date(2020, 1, 1) + timedelta(days=i),
+            }
+            for i in range(start, start + count)
+        ])
+    async with AsyncSessionLocal() as session:
+        await rebuild_index(session)
+
+
+async def _count_queries(client: httpx.AsyncClient, url: str, headers: dict) -> int:
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    response_cache.clear() # 캐시 적중 시 SQL이 실행되지 않으므로 매번 DB에서 조회
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = await client.get(url, headers=headers)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 200, response.text
+    return len(statements)
+
+
+async def _measure(client: httpx.AsyncClient) -> dict:
+    headers = {"Authorization": "Bearer " + create_jwt_token("user1@example.com", 1, "user")}
+    admin_headers = {"Authorization": "Bearer " + create_jwt_token("user2@example.com", 2, "admin")}
+    return {
+        "public_feed": await _count_queries(client, "/diarys/?state=true", headers),
+        "feed_page": await _count_queries(client, "/diarys/?limit=20", headers),
+        "admin_feed": await _count_queries(client, "/diarys/", admin_headers),
+        "detail": await _count_queries(client, "/diarys/1", headers),
+        "search": await _count_queries(client, "/diarys/list/search?search=산책", headers),
+    }
+
+
+@pytest.fixture(scope="module")
+def query_counts():
+    conn()
+
+    async def run():
+        async with async_engine.begin() as connection:
+            await connection.execute(insert(User), [
+                {"id": i, "email": f"user{i}@example.com", "password": "", "username": f"user{i}", "role": "user"}
+                for i in range(1, USERS + 1)
+            ])
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            await _seed(0, N)
+            small = await _measure(client)
+            await _seed(N, N)
+            large = await _measure(client)
+        await async_engine.dispose()
+        return small, large
+
+    return asyncio.run(run())
+
+
+def test_query_count_does_not_grow_with_diaries(query_counts):
+    small, large = query_counts
+    assert small == large
+
+
+def test_query_count_is_constant(query_counts):
+    small, _ = query_counts
+    # 목록/상세는 작성자 이름까지 조인한 한 번의 조회, 검색은 색인 조회 + 본문 조회
+    assert small == {"public_feed": 1, "feed_page": 1, "admin_feed": 1, "detail": 1, "search": 2}
@@ -1,14 +1,103 @@
+import asyncio
+import re
+import time
 import httpx
 import uuid
 import os
+from typing import List, Optional, Tuple
 from dotenv import load_dotenv
 
+from utils.metrics import observe_external
+
 load_dotenv()  # .env 파일 읽어서 환경 변수 설정
 
 CLOVA_API_KEY = os.getenv("CLOVA_API_KEY")
+CLOVA_API_URL = "https://clovastudio.stream.ntruss.com/testapp/v3/chat-completions/HCX-005"
+
+# 공유 HTTP 클라이언트 설정 (.env 로 조정 가능)
+CLOVA_CONNECT_TIMEOUT = float(os.getenv("CLOVA_CONNECT_TIMEOUT", "3"))
+CLOVA_READ_TIMEOUT = float(os.getenv("CLOVA_READ_TIMEOUT", "15"))
+CLOVA_MAX_CONNECTIONS = int(os.getenv("CLOVA_MAX_CONNECTIONS", "20"))
+CLOVA_MAX_CONCURRENCY = int(os.getenv("CLOVA_MAX_CONCURRENCY", "10")) # 동시에 보내는 요청 수 상한
+
+# 마이크로 배치 설정: 짧은 시간 동안 모인 요청을 하나의 프롬프트로 묶어서 전송 (1이면 사용 안 함)
+CLOVA_BATCH_SIZE = int(os.getenv("CLOVA_BATCH_SIZE", "8"))
+CLOVA_BATCH_WAIT_MS = float(os.getenv("CLOVA_BATCH_WAIT_MS", "50"))
+
+EMOTION_LABELS = ("긍정", "부정", "중립", "슬픔", "놀람")
+
+SYSTEM_PROMPT = (
+    "- 이것은 문장 감정 분석기 입니다.\n"
+    "- 감정만 답하고 부연 설명은 하지 마세요.\n"
+    "- 감정은 다음 중 하나로만 답하세요: 긍정, 부정, 중립, 슬픔, 놀람\n"
+    "문장: 기분 진짜 좋다\n감정: 긍정\n"
+    "###\n"
+    "문장: 아오 진짜 짜증나게 하네\n감정: 부정\n"
+    "###\n"
+    "문장: 이걸로 보내드릴게요\n감정: 중립\n"
+    "###\n"
+    "문장: 너무 슬퍼서 눈물이 난다\n감정: 슬픔\n"
+    "###\n"
+    "문장: 헐 진짜 이게 가능해?\n감정: 놀람\n"
+    "###"
+)
+
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + (
+    "\n- 번호가 붙은 여러 문장이 주어지면 모든 번호에 대해 한 줄에 하나씩 '번호. 감정' 형식으로 답하세요.\n"
+    "문장:\n1. 기분 진짜 좋다\n2. 너무 슬퍼서 눈물이 난다\n감정:\n1. 긍정\n2. 슬픔\n"
+    "###"
+)
+
+_BATCH_LINE_RE = re.compile(r"^\s*(\d+)\s*[.):]\s*(" + "|".join(EMOTION_LABELS) + r")")
+
+# 애플리케이션 lifespan 동안 재사용하는 클라이언트 (커넥션 풀 / keep-alive / HTTP/2)
+_client: Optional[httpx.AsyncClient] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+async def init_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """
+    공유 클라이언트를 생성합니다. 테스트에서는 httpx.MockTransport 등을 transport로 주입할 수 있습니다.
+    """
+    global _client, _semaphore
+    await close_client()
+    _client = httpx.AsyncClient(
+        http2=transport is None,
+        transport=transport,
+        timeout=httpx.Timeout(CLOVA_READ_TIMEOUT, connect=CLOVA_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=CLOVA_MAX_CONNECTIONS,
+            max_keepalive_connections=CLOVA_MAX_CONNECTIONS,
+            keepalive_expiry=60,
+        ),
+    )
+    _semaphore = asyncio.Semaphore(CLOVA_MAX_CONCURRENCY)
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
-async def analyze_emotion_async(content: str) -> str:
-    CLOVA_API_URL = "https://clovastudio.stream.ntruss.com/testapp/v3/chat-completions/HCX-005"
+def _get_semaphore() -> asyncio.Semaphore:
+    # client를 직접 주입해 init_client() 없이 호출하는 경우(테스트 등)에도 동시 요청 수 제한 적용
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(CLOVA_MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def get_client() -> httpx.AsyncClient:
+    # lifespan 밖(관리 명령 등)에서 호출된 경우 필요할 때 생성
+    if _client is None:
+        await init_client()
+    return _client
+
+
+async def chat_completion(messages: List[dict], max_tokens: int = 20, client: Optional[httpx.AsyncClient] = None) -> str:
     headers = {
         "Authorization": CLOVA_API_KEY,  # .env에서 불러온 값 사용
         "X-NCP-CLOVASTUDIO-REQUEST-ID": str(uuid.uuid4()),
@@ -16,46 +105,128 @@ async def analyze_emotion_async(content: str) -> str:
         "Accept": "application/json"
     }
 
+    payload = {
+        "messages": messages,
+        "topP": 0.6,
+        "topK": 0,
+        "maxTokens": max_tokens,
+        "temperature": 0.1,
+        "repetitionPenalty": 1.1,
+        "stop": ["###"],
+        "includeAiFilters": True,
+        "seed": 0
+    }
+
+    client = client or await get_client()
+    async with _get_semaphore():
+        started = time.perf_counter()
+        try:
+            response = await client.post(CLOVA_API_URL, headers=headers, json=payload)
+            response.raise_for_status()
+        except Exception:
+            observe_external("clova", "chat_completion", started, error=True)
+            raise
+        observe_external("clova", "chat_completion", started)
+    result = response.json()
+    # 응답 예시 구조에 맞게 파싱
+    return result["result"]["message"]["content"].strip()
+
+
+async def analyze_emotion_async(content: str, client: Optional[httpx.AsyncClient] = None) -> str:
     prompt = [
         {
             "role": "system",
-            "content": (
-            "- 이것은 문장 감정 분석기 입니다.\n"
-            "- 감정만 답하고 부연 설명은 하지 마세요.\n"
-            "- 감정은 다음 중 하나로만 답하세요: 긍정, 부정, 중립, 슬픔, 놀람\n"
-            "문장: 기분 진짜 좋다\n감정: 긍정\n"
-            "###\n"
-            "문장: 아오 진짜 짜증나게 하네\n감정: 부정\n"
-            "###\n"
-            "문장: 이걸로 보내드릴게요\n감정: 중립\n"
-            "###\n"
-            "문장: 너무 슬퍼서 눈물이 난다\n감정: 슬픔\n"
-            "###\n"
-            "문장: 헐 진짜 이게 가능해?\n감정: 놀람\n"
-            "###"
-        )
+            "content": SYSTEM_PROMPT
         },
         {
             "role": "user",
             "content": f"문장: {content}\n감정:"
         }
     ]
+    return await chat_completion(prompt, client=client)
+
+
+def parse_batch_response(text: str, size: int) -> Optional[List[str]]:
+    """'번호. 감정' 형식의 응답을 파싱합니다. 누락된 번호가 있으면 None을 반환합니다."""
+    labels = {}
+    for line in text.splitlines():
+        match = _BATCH_LINE_RE.match(line)
+        if match:
+            labels.setdefault(int(match.group(1)), match.group(2))
+    if any(number not in labels for number in range(1, size + 1)):
+        return None
+    return [labels[number] for number in range(1, size + 1)]
+
+
+async def analyze_emotion_batch_async(contents: List[str]) -> Optional[List[str]]:
+    numbered = "\n".join(f"{i}. {' '.join(content.split())}" for i, content in enumerate(contents, start=1))
+    prompt = [
+        {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+        {"role": "user", "content": f"문장:\n{numbered}\n감정:"},
+    ]
+    text = await chat_completion(prompt, max_tokens=8 * len(contents) + 8)
+    return parse_batch_response(text, len(contents))
+
+
+class EmotionBatcher:
+    """
+    동시에 들어온 감정 분석 요청을 최대 max_batch_size개 또는 max_wait_ms 동안 모아
+    한 번의 Clova 호출로 처리합니다. 응답 파싱에 실패한 경우에만 개별 요청으로 대체합니다.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def classify(self, content: str) -> str:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((content, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        contents = [content for content, _ in batch]
+        labels = None
+        if len(batch) > 1:
+            try:
+                labels = await analyze_emotion_batch_async(contents)
+            except Exception as e:
+                # 429/타임아웃/5xx 등 호출 자체가 실패하면 개별 요청으로 나누지 않고 그대로 전달
+                # (장애 중에 요청 수를 늘리지 않고 워커의 재시도 백오프를 따름)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+        if labels is None:
+            # 단건 요청이거나 배치 응답을 해석할 수 없는 경우 개별 요청으로 처리
+            results = await asyncio.gather(*[analyze_emotion_async(content) for content in contents], return_exceptions=True)
+        else:
+            results = labels
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
 
-    payload = {
-        "messages": prompt,
-        "topP": 0.6,
-        "topK": 0,
-        "maxTokens": 20,
-        "temperature": 0.1,
-        "repetitionPenalty": 1.1,
-        "stop": ["###"],
-        "includeAiFilters": True,
-        "seed": 0
-    }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(CLOVA_API_URL, headers=headers, json=payload)
-        result = response.json()
-        # 응답 예시 구조에 맞게 파싱
-        emotion_text = result["result"]["message"]["content"].strip()
-        return emotion_text
+emotion_batcher = EmotionBatcher(CLOVA_BATCH_SIZE, CLOVA_BATCH_WAIT_MS)
@@ -0,0 +1,205 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import AsyncIterator, Dict, List, Optional, Union
+
+from pydantic import BaseModel, ValidationError, field_validator
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+
+from database.connection import async_engine
+from database.replicas import read_session
+from models.diarys import Diary, korea_now
+from models.emotion import EmotionJob
+from models.search import DiaryToken
+from utils.clova import EMOTION_LABELS
+from utils.emotion_stats import apply_emotion_deltas, emotion_deltas
+from utils.search import build_tokens
+
+# 내보내기/가져오기에 사용하는 필드 (내보낸 파일을 그대로 다시 가져올 수 있음)
+EXPORT_FIELDS = ["id", "title", "content", "image", "state", "emotion", "diary_date", "created_at"]
+EXPORT_BATCH_SIZE = 500 # 서버 측 커서에서 한 번에 가져오는 행 수
+IMPORT_CHUNK_SIZE = 500 # 한 트랜잭션에서 executemany로 넣는 일기 수
+MAX_IMPORT_ERRORS = 100 # 응답에 포함하는 오류 줄 수 상한
+
+
+# --- 내보내기 ---
+
+def _export_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+async def stream_diaries(user_id: Optional[int], export_format: str = "ndjson") -> AsyncIterator[str]:
+    """
+    일기를 id 순으로 NDJSON 또는 CSV 문자열 조각으로 내보냅니다. (user_id가 None이면 전체 사용자)
+    서버 측 커서(yield_per)로 EXPORT_BATCH_SIZE 행씩 가져오므로 전체 결과를 메모리에 올리지 않습니다.
+    StreamingResponse가 요청 의존성이 정리된 뒤에도 읽으므로 세션을 직접 엽니다.
+    (읽기 복제본이 있으면 복제본에서 읽고, 방금 쓰기를 한 사용자의 내보내기는 기본 DB에서 읽음)
+    """
+    fields = EXPORT_FIELDS if user_id is not None else EXPORT_FIELDS + ["user_id"]
+    statement = select(*(getattr(Diary, field) for field in fields)).order_by(Diary.id)
+    if user_id is not None:
+        statement = statement.where(Diary.user_id == user_id)
+
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        yield "\ufeff" + buffer.getvalue() # 엑셀에서 한글이 깨지지 않도록 BOM 추가
+
+    async with read_session(user_id) as session:
+        result = await session.stream(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows([_export_value(value) for value in row] for row in rows)
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps({field: _export_value(value) for field, value in zip(fields, row)}, ensure_ascii=False) + "\n"
+                    for row in rows
+                )
+
+
+# --- 가져오기 ---
+
+class DiaryImport(BaseModel):
+    title: str
+    content: str
+    image: str = ""
+    state: bool = False
+    emotion: Optional[str] = None
+    diary_date: date
+    created_at: Optional[datetime] = None
+
+    @field_validator("emotion")
+    @classmethod
+    def known_emotion(cls, value):
+        # 알 수 없는 감정 값은 버리고 다시 분석
+        return value if value in EMOTION_LABELS else None
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """바이트 청크 스트림을 줄 단위로 나눕니다. (파일 전체를 읽지 않음, 디코딩은 import_diaries에서 줄마다 수행)"""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+async def _insert_chunk(user_id: int, records: List[DiaryImport]) -> Dict[str, int]:
+    """
+    한 청크를 한 트랜잭션으로 저장합니다.
+    이미 있는 날짜((user_id, diary_date) 유니크)와 청크 안의 중복 날짜는 건너뜁니다.
+    """
+    async with async_engine.begin() as connection:
+        dates = list({record.diary_date for record in records})
+        existing = set((await connection.execute(
+            select(Diary.diary_date).where(Diary.user_id == user_id, Diary.diary_date.in_(dates))
+        )).scalars().all())
+
+        new_records = {}
+        for record in records:
+            if record.diary_date not in existing and record.diary_date not in new_records:
+                new_records[record.diary_date] = record
+        if not new_records:
+            return {"inserted": 0, "duplicates": len(records)}
+
+        now = korea_now()
+        await connection.execute(insert(Diary), [
+            {
+                "title": record.title,
+                "content": record.content,
+                "image": record.image,
+                "state": record.state,
+                "emotion": record.emotion,
+                "emotion_status": "done" if record.emotion else ("pending" if record.content else None),
+                "user_id": user_id,
+                "created_at": record.created_at or now,
+                "diary_date": record.diary_date,
+            }
+            for record in new_records.values()
+        ])
+
+        # executemany는 생성된 id를 돌려주지 않으므로 유니크 키로 다시 조회해 색인/작업/통계 작성
+        rows = (await connection.execute(
+            select(Diary.id, Diary.title, Diary.content, Diary.emotion, Diary.diary_date)
+            .where(Diary.user_id == user_id, Diary.diary_date.in_(list(new_records)))
+        )).all()
+        tokens = [
+            {"token": token.token, "diary_id": token.diary_id, "weight": token.weight}
+            for row in rows
+            for token in build_tokens(row.id, row.title, row.content)
+        ]
+        if tokens:
+            await connection.execute(insert(DiaryToken), tokens)
+        jobs = [
+            {"diary_id": row.id, "status": "pending", "attempts": 0, "next_run_at": now, "created_at": now}
+            for row in rows
+            if not row.emotion and row.content
+        ]
+        if jobs:
+            await connection.execute(insert(EmotionJob), jobs)
+        await apply_emotion_deltas(connection, emotion_deltas(
+            (user_id, row.diary_date, None, row.emotion) for row in rows if row.emotion
+        ))
+    return {
+        "inserted": len(new_records),
+        "duplicates": len(records) - len(new_records),
+        "public": sum(1 for record in new_records.values() if record.state),
+    }
+
+
+async def import_diaries(user_id: int, lines: AsyncIterator[Union[str, bytes]], chunk_size: int = IMPORT_CHUNK_SIZE) -> dict:
+    """
+    NDJSON 줄 스트림(문자열 또는 UTF-8 바이트)을 읽어 user_id의 일기로 가져옵니다.
+    잘못된 줄(UTF-8이 아닌 줄 포함)은 건너뛰고 줄 번호와 함께 errors에 기록합니다.
+    """
+    report = {"inserted": 0, "duplicates": 0, "public": 0, "invalid": 0, "errors": []}
+
+    def record_error(line_number: int, message: str):
+        report["invalid"] += 1
+        if len(report["errors"]) < MAX_IMPORT_ERRORS:
+            report["errors"].append({"line": line_number, "error": message})
+
+    async def flush(records):
+        try:
+            counts = await _insert_chunk(user_id, records)
+        except IntegrityError:
+            # 다른 요청이 같은 날짜를 먼저 저장한 경우: 다시 조회하면 중복으로 건너뜀
+            counts = await _insert_chunk(user_id, records)
+        for key, value in counts.items():
+            report[key] += value
+
+    records: List[DiaryImport] = []
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if isinstance(line, bytes):
+            try:
+                line = line.decode("utf-8-sig")
+            except UnicodeDecodeError:
+                record_error(line_number, "UTF-8로 인코딩되지 않은 줄입니다.")
+                continue
+        if not line.strip():
+            continue
+        try:
+            records.append(DiaryImport.model_validate_json(line))
+        except ValidationError as e:
+            record_error(line_number, e.errors(include_url=False)[0]["msg"])
+            continue
+        if len(records) >= chunk_size:
+            await flush(records)
+            records = []
+    if records:
+        await flush(records)
+    return report
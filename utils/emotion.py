@@ -0,0 +1,28 @@
+from utils.clova import CLOVA_BATCH_SIZE, analyze_emotion_async, emotion_batcher
+from database.connection import settings
+from utils.emotion_cache import emotion_cache
+from utils.emotion_lexicon import lexicon_classifier
+
+
+async def classify_emotion(content: str) -> str:
+    """
+    일기 본문의 감정을 반환합니다.
+    로컬 분류기의 신뢰도가 충분하면 바로 반환하고, 애매한 문장만 캐시 -> Clova 순으로 처리합니다.
+    같은 본문을 이미 분석한 적이 있으면 캐시 결과를 사용하고 Clova를 호출하지 않습니다.
+    """
+    if settings.EMOTION_MODE != "clova":
+        label, confidence = lexicon_classifier.classify(content)
+        if settings.EMOTION_MODE == "local" or confidence >= settings.EMOTION_LOCAL_THRESHOLD:
+            return label
+
+    emotion = await emotion_cache.get(content)
+    if emotion is not None:
+        return emotion
+
+    if CLOVA_BATCH_SIZE > 1:
+        # 동시에 들어온 다른 요청과 묶어서 한 번의 Clova 호출로 처리
+        emotion = await emotion_batcher.classify(content)
+    else:
+        emotion = await analyze_emotion_async(content)
+    await emotion_cache.set(content, emotion)
+    return emotion
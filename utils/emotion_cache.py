@@ -0,0 +1,102 @@
+import hashlib
+import logging
+import re
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+
+from database.connection import AsyncSessionLocal, settings
+from models.diarys import korea_now
+from models.emotion import EmotionCacheEntry
+
+logger = logging.getLogger("uvicorn.error")
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def content_hash(content: str) -> str:
+    # 공백/유니코드 표기 차이만 있는 본문은 같은 키가 되도록 정규화 후 해시
+    normalized = _SPACE_RE.sub(" ", unicodedata.normalize("NFKC", content)).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class EmotionCache:
+    """
+    감정 분석 결과 2단계 캐시.
+    1단계: 프로세스 메모리 LRU, 2단계: DB 테이블 (서버 재시작/여러 프로세스 간 공유)
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict() # hash -> (emotion, created_at)
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, emotion: str, created_at):
+        self._memory[key] = (emotion, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    async def get(self, content: str) -> Optional[str]:
+        key = content_hash(content)
+        now = korea_now()
+
+        cached = self._memory.get(key)
+        if cached:
+            emotion, created_at = cached
+            if now - created_at < self.ttl:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return emotion
+            del self._memory[key]
+
+        async with AsyncSessionLocal() as session:
+            entry = await session.get(EmotionCacheEntry, key)
+        if entry and now - entry.created_at < self.ttl:
+            self._remember(key, entry.emotion, entry.created_at)
+            self.db_hits += 1
+            return entry.emotion
+
+        self.misses += 1
+        return None
+
+    async def set(self, content: str, emotion: str):
+        key = content_hash(content)
+        now = korea_now()
+        self._remember(key, emotion, now)
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.merge(EmotionCacheEntry(content_hash=key, emotion=emotion, created_at=now))
+                await session.commit()
+        except IntegrityError:
+            pass # 다른 요청이 같은 본문을 먼저 저장한 경우
+
+    async def purge_expired(self) -> int:
+        """TTL이 지난 DB 캐시 행을 삭제합니다."""
+        async with AsyncSessionLocal() as session:
+            result = await session.exec(delete(EmotionCacheEntry).where(EmotionCacheEntry.created_at < korea_now() - self.ttl))
+            await session.commit()
+        return result.rowcount
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else 0.0,
+            "memory_size": len(self._memory),
+        }
+
+
+emotion_cache = EmotionCache(
+    max_size=settings.EMOTION_CACHE_SIZE,
+    ttl_seconds=settings.EMOTION_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,104 @@
+import json
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from database.connection import settings
+
+# 감정별 어휘와 가중치 (어간 위주로 등록해서 활용형도 부분 문자열로 매칭)
+# 부정 표현("안좋", "좋지않" 등)은 더 긴 어휘로 먼저 매칭되므로 안의 "좋"은 따로 세지 않음
+DEFAULT_LEXICON: Dict[str, Dict[str, float]] = {
+    "긍정": {
+        "좋": 1, "좋아": 1, "행복": 2, "기쁘": 2, "기뻐": 2, "기뻤": 2, "신나": 2, "신났": 2, "즐거": 2, "즐겁": 2,
+        "최고": 2, "감사": 1.5, "고마": 1.5, "고맙": 1.5, "사랑": 1.5, "설레": 2, "설렜": 2, "뿌듯": 2, "만족": 1.5,
+        "웃": 1, "재밌": 1.5, "재미있": 1.5, "맛있": 1, "편안": 1, "다행": 1.5, "성공": 1, "합격": 2, "축하": 1.5,
+    },
+    "부정": {
+        "짜증": 2.5, "화나": 2.5, "화가": 2, "화났": 2.5, "싫": 2, "최악": 2.5, "답답": 2, "불안": 1.5, "걱정": 1,
+        "힘들": 1.5, "힘든": 1.5, "피곤": 1, "스트레스": 2, "열받": 2.5, "빡치": 2.5, "귀찮": 1.5, "억울": 2,
+        "안좋": 2.5, "좋지않": 2.5, "별로": 1.5, "망했": 2, "실망": 2, "후회": 1.5, "미워": 2, "밉": 1.5,
+    },
+    "슬픔": {
+        "슬프": 2.5, "슬퍼": 2.5, "슬펐": 2.5, "눈물": 2.5, "울었": 2, "울고": 1.5, "우울": 2.5, "외로": 2,
+        "외롭": 2, "그립": 2, "그리워": 2, "서운": 2, "속상": 2, "허전": 2, "아쉽": 1, "아쉬": 1, "보고싶": 1.5,
+        "이별": 2, "헤어": 1.5, "떠났": 1,
+    },
+    "놀람": {
+        "헐": 2.5, "대박": 2, "깜짝": 2.5, "놀라": 2.5, "놀랐": 2.5, "설마": 2, "믿기지": 2, "믿을수없": 2,
+        "세상에": 2, "어떻게이럴": 2, "말도안돼": 2, "신기": 1.5, "갑자기": 1,
+    },
+    "중립": {
+        "보내드": 1.5, "확인": 1, "예정": 1, "했다": 0.3, "갔다": 0.5, "먹었": 0.5, "일정": 1,
+    },
+}
+
+
+class LexiconClassifier:
+    """
+    네트워크 호출 없이 어휘 사전으로 감정을 추정하는 분류기.
+    결과와 함께 신뢰도(0~1)를 반환하므로 애매한 문장만 Clova로 넘길 수 있습니다.
+    """
+
+    def __init__(self, lexicon: Optional[Dict[str, Dict[str, float]]] = None):
+        self.load(lexicon or DEFAULT_LEXICON)
+
+    def load(self, lexicon: Dict[str, Dict[str, float]]):
+        self._terms: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+        for label, terms in lexicon.items():
+            for term, weight in terms.items():
+                self._terms[self._normalize(term)].append((label, float(weight)))
+        # 첫 글자별로 가능한 어휘 길이 목록 (긴 것부터) -> 대부분의 글자는 사전 조회 한 번으로 건너뜀
+        lengths: Dict[str, set] = defaultdict(set)
+        for term in self._terms:
+            lengths[term[0]].add(len(term))
+        self._lengths = {first: sorted(values, reverse=True) for first, values in lengths.items()}
+
+    @classmethod
+    def from_file(cls, path: str) -> "LexiconClassifier":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        # 띄어쓰기 차이를 무시하기 위해 공백 제거 ("안 좋다" == "안좋다")
+        return "".join(unicodedata.normalize("NFKC", text).split())
+
+    def scores(self, text: str) -> Dict[str, float]:
+        text = self._normalize(text)
+        terms = self._terms
+        lengths_by_first = self._lengths
+        scores: Dict[str, float] = defaultdict(float)
+        # 가장 긴 어휘부터 매칭하고 매칭된 구간은 건너뜀 ("안좋"에서 "좋"이 다시 긍정으로 잡히지 않도록)
+        i = 0
+        while i < len(text):
+            step = 1
+            for length in lengths_by_first.get(text[i], ()):
+                matches = terms.get(text[i:i + length])
+                if matches:
+                    for label, weight in matches:
+                        scores[label] += weight
+                    step = length
+                    break
+            i += step
+        return scores
+
+    def classify(self, text: str) -> Tuple[str, float]:
+        """(감정, 신뢰도)를 반환합니다. 감정 어휘가 하나도 없으면 ("중립", 0.0)"""
+        scores = self.scores(text)
+        if not scores:
+            return "중립", 0.0
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        top_label, top_score = ranked[0]
+        second_score = ranked[1][1] if len(ranked) > 1 else 0.0
+        total = sum(scores.values())
+        # 1위와 2위의 차이가 클수록, 근거 어휘가 많을수록 신뢰도가 높아짐
+        confidence = (top_score - second_score) / (total + 1)
+        return top_label, round(confidence, 4)
+
+
+# 시작 시점에 한 번만 로드 (EMOTION_LEXICON_PATH 가 있으면 해당 JSON 사전을 사용)
+lexicon_classifier = (
+    LexiconClassifier.from_file(settings.EMOTION_LEXICON_PATH)
+    if settings.EMOTION_LEXICON_PATH
+    else LexiconClassifier()
+)
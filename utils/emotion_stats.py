@@ -0,0 +1,103 @@
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.dialects import mysql, sqlite
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database.connection import async_engine
+from models.diarys import Diary
+from models.emotion import EmotionStat
+
+GLOBAL_USER_ID = 0 # 전체 사용자 합계 행의 user_id
+PERIODS = ("day", "week", "month")
+
+
+def period_start(period: str, diary_date: date) -> date:
+    if period == "week":
+        return diary_date - timedelta(days=diary_date.weekday())
+    if period == "month":
+        return diary_date.replace(day=1)
+    return diary_date
+
+
+def emotion_deltas(changes: Iterable[Tuple[int, date, Optional[str], Optional[str]]]) -> Counter:
+    """
+    (user_id, diary_date, 이전 감정, 새 감정) 목록을 롤업 행 단위 증감으로 변환합니다.
+    키: (user_id, period, period_start, emotion)
+    """
+    deltas: Counter = Counter()
+    for user_id, diary_date, old_emotion, new_emotion in changes:
+        if old_emotion == new_emotion:
+            continue
+        for emotion, delta in ((old_emotion, -1), (new_emotion, 1)):
+            if not emotion:
+                continue
+            for scope in (user_id, GLOBAL_USER_ID):
+                for period in PERIODS:
+                    deltas[(scope, period, period_start(period, diary_date), emotion)] += delta
+    return deltas
+
+
+def _upsert_statement(rows: List[Dict]):
+    # 행이 없으면 추가, 있으면 count에 증감을 더함 (DB별 upsert 구문)
+    if async_engine.dialect.name == "mysql":
+        statement = mysql.insert(EmotionStat).values(rows)
+        return statement.on_duplicate_key_update(count=EmotionStat.count + statement.inserted["count"])
+    statement = sqlite.insert(EmotionStat).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=["user_id", "period", "period_start", "emotion"],
+        set_={"count": EmotionStat.count + statement.excluded["count"]},
+    )
+
+
+async def apply_emotion_deltas(executor, deltas: Counter, chunk_size: int = 500):
+    """
+    롤업 테이블에 증감을 반영합니다. executor는 AsyncSession 또는 AsyncConnection이며
+    commit은 호출하는 쪽에서 수행합니다 (일기 변경과 같은 트랜잭션).
+    """
+    rows = [
+        {"user_id": user_id, "period": period, "period_start": start, "emotion": emotion, "count": delta}
+        for (user_id, period, start, emotion), delta in deltas.items()
+        if delta
+    ]
+    for i in range(0, len(rows), chunk_size):
+        statement = _upsert_statement(rows[i:i + chunk_size])
+        if isinstance(executor, AsyncSession):
+            await executor.exec(statement)
+        else:
+            await executor.execute(statement)
+
+
+async def apply_emotion_change(session: AsyncSession, user_id: Optional[int], diary_date: date,
+                               old_emotion: Optional[str], new_emotion: Optional[str]):
+    if user_id is None:
+        return
+    await apply_emotion_deltas(session, emotion_deltas([(user_id, diary_date, old_emotion, new_emotion)]))
+
+
+async def rebuild_emotion_stats(session: AsyncSession, chunk_size: int = 5000) -> int:
+    """일기 테이블을 청크 단위로 읽어 롤업을 처음부터 다시 계산합니다. 처리한 일기 수를 반환합니다."""
+    deltas: Counter = Counter()
+    count = 0
+    last_id = 0
+    while True:
+        rows = (await session.exec(
+            select(Diary.id, Diary.user_id, Diary.diary_date, Diary.emotion)
+            .where(Diary.id > last_id, Diary.emotion != None, Diary.user_id != None)
+            .order_by(Diary.id)
+            .limit(chunk_size)
+        )).all()
+        if not rows:
+            break
+        deltas.update(emotion_deltas((user_id, diary_date, None, emotion) for _, user_id, diary_date, emotion in rows))
+        count += len(rows)
+        last_id = rows[-1][0]
+
+    # 롤업 행 수는 (사용자 x 기간 x 감정)이라 일기 수보다 훨씬 작으므로 한 트랜잭션에서 교체
+    await session.exec(delete(EmotionStat))
+    await apply_emotion_deltas(session, deltas)
+    await session.commit()
+    return count
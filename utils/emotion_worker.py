@@ -0,0 +1,197 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, update
+from sqlmodel import select
+
+from database.connection import AsyncSessionLocal, settings
+from models.diarys import Diary, korea_now
+from models.emotion import EmotionJob
+from utils.emotion import classify_emotion
+from utils.emotion_lexicon import lexicon_classifier
+from utils.emotion_stats import apply_emotion_change
+from utils.response_cache import response_cache
+
+logger = logging.getLogger("uvicorn.error")
+
+
+async def enqueue_emotion_job(session, diary: Diary):
+    """
+    일기의 감정 분석 작업을 큐에 추가합니다. (commit은 호출하는 쪽에서 수행)
+    commit 이후 emotion_worker.notify()를 호출하면 대기 중인 워커가 바로 작업을 가져갑니다.
+    """
+    diary.emotion_status = "pending"
+    session.add(diary)
+    # 아직 시작하지 않은 이전 작업은 새 작업으로 대체 (일기당 대기 작업 하나)
+    await session.exec(delete(EmotionJob).where(EmotionJob.diary_id == diary.id, EmotionJob.status == "pending"))
+    session.add(EmotionJob(diary_id=diary.id))
+
+
+class EmotionWorker:
+    """
+    감정 분석 작업 테이블을 처리하는 인프로세스 asyncio 워커 풀.
+    동시에 실행되는 Clova 요청 수는 워커 수(concurrency)로 제한됩니다.
+    """
+
+    def __init__(self, concurrency: int, max_attempts: int, retry_base_seconds: float, lease_seconds: float, poll_interval: float = 5.0):
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        # 처리 중에 종료된 프로세스의 작업은 임대 시간(lease_seconds)이 지나면 _claim에서 다시 가져감
+        # (시작 시 running 작업을 일괄 초기화하면 다른 프로세스가 처리 중인 작업까지 가져오게 됨)
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                job_id = await self._claim()
+            except Exception as e:
+                logger.warning(f"감정 분석 작업 조회 실패: {e}")
+                job_id = None
+
+            if job_id is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._process(job_id)
+            except Exception as e:
+                logger.warning(f"감정 분석 작업 {job_id} 처리 실패: {e}")
+
+    async def _claim(self) -> Optional[int]:
+        """
+        실행할 작업 하나를 running 상태로 바꾸고 id를 반환합니다. 다른 워커와 경쟁하면 다음 후보를 시도합니다.
+        running 작업의 next_run_at은 임대 만료 시각이므로, 만료된 running 작업(처리 중 종료된 프로세스)도 다시 가져옵니다.
+        """
+        async with AsyncSessionLocal() as session:
+            now = korea_now()
+            candidates = (await session.exec(
+                select(EmotionJob.id, EmotionJob.next_run_at)
+                .where(EmotionJob.status.in_(("pending", "running")), EmotionJob.next_run_at <= now)
+                .order_by(EmotionJob.next_run_at)
+                .limit(self.concurrency)
+            )).all()
+            for job_id, next_run_at in candidates:
+                # next_run_at이 그대로인 경우에만 가져감 (다른 워커가 먼저 가져가면 임대 시각이 바뀜)
+                result = await session.exec(
+                    update(EmotionJob)
+                    .where(EmotionJob.id == job_id, EmotionJob.status.in_(("pending", "running")), EmotionJob.next_run_at == next_run_at)
+                    .values(status="running", next_run_at=now + timedelta(seconds=self.lease_seconds))
+                )
+                await session.commit()
+                if result.rowcount == 1:
+                    return job_id
+        return None
+
+    async def _save_emotion(self, session, diary: Diary, content: str, emotion: Optional[str], status: str = "done") -> bool:
+        """
+        분석한 본문이 그대로인 경우에만 결과를 저장합니다. (commit은 호출하는 쪽에서 수행)
+        분석 중에 내용이 수정되었다면 새 작업이 최신 내용을 분석하므로 이전 결과는 버립니다.
+        감정 통계 증감은 실제로 바꾼 이전 감정 기준으로 계산합니다.
+        (분석 전에 읽은 값을 쓰면 동시에 끝난 다른 작업의 변경과 겹쳐 통계가 어긋남)
+        """
+        if status != "done":
+            result = await session.exec(
+                update(Diary)
+                .where(Diary.id == diary.id, Diary.content == content)
+                .values(emotion_status=status)
+                .execution_options(synchronize_session=False)
+            )
+            return result.rowcount == 1
+
+        old_emotion = diary.emotion
+        for _ in range(3):
+            # 이전 감정이 그대로일 때만 변경 (MySQL: emotion <=> :old)
+            result = await session.exec(
+                update(Diary)
+                .where(Diary.id == diary.id, Diary.content == content, Diary.emotion.is_not_distinct_from(old_emotion))
+                .values(emotion=emotion, emotion_status="done")
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                await apply_emotion_change(session, diary.user_id, diary.diary_date, old_emotion, emotion)
+                return True
+            # 다른 작업이 먼저 감정을 바꾼 경우: 행을 잠그고 현재 값을 다시 읽어 재시도
+            current = (await session.exec(
+                select(Diary.content, Diary.emotion).where(Diary.id == diary.id).with_for_update()
+            )).first()
+            if not current or current.content != content:
+                return False
+            old_emotion = current.emotion
+        return False
+
+    async def _process(self, job_id: int):
+        # 분석에 필요한 값만 읽고 세션을 닫음 (Clova 호출 동안 커넥션/트랜잭션을 잡고 있지 않도록)
+        async with AsyncSessionLocal() as session:
+            job = await session.get(EmotionJob, job_id)
+            if not job:
+                return
+            diary = await session.get(Diary, job.diary_id)
+            if not diary or not diary.content:
+                await session.exec(delete(EmotionJob).where(EmotionJob.id == job_id))
+                await session.commit()
+                return
+
+        content = diary.content
+        try:
+            emotion = await classify_emotion(content)
+        except Exception as e:
+            attempts = job.attempts + 1
+            values = {"attempts": attempts, "last_error": str(e)[:255]}
+            saved = False
+            async with AsyncSessionLocal() as session:
+                if attempts >= self.max_attempts:
+                    values["status"] = "failed"
+                    if settings.EMOTION_MODE == "hybrid":
+                        # Clova를 끝내 사용할 수 없으면 로컬 분류 결과로 대체
+                        fallback, _ = lexicon_classifier.classify(content)
+                        saved = await self._save_emotion(session, diary, content, fallback)
+                    else:
+                        await self._save_emotion(session, diary, content, None, status="failed")
+                else:
+                    # 지수 백오프 후 재시도
+                    values["status"] = "pending"
+                    values["next_run_at"] = korea_now() + timedelta(seconds=self.retry_base_seconds * 2 ** (attempts - 1))
+                await session.exec(update(EmotionJob).where(EmotionJob.id == job_id).values(**values))
+                await session.commit()
+            if saved and diary.state:
+                response_cache.invalidate_public_diary(diary.id)
+            return
+
+        async with AsyncSessionLocal() as session:
+            saved = await self._save_emotion(session, diary, content, emotion)
+            await session.exec(delete(EmotionJob).where(EmotionJob.id == job_id))
+            await session.commit()
+        if saved and diary.state:
+            # 공개 일기의 감정이 채워졌으므로 캐시된 피드/상세 응답 무효화
+            response_cache.invalidate_public_diary(diary.id)
+
+emotion_worker = EmotionWorker(
+    concurrency=settings.EMOTION_WORKERS,
+    max_attempts=settings.EMOTION_MAX_ATTEMPTS,
+    retry_base_seconds=settings.EMOTION_RETRY_BASE_SECONDS,
+    lease_seconds=settings.EMOTION_JOB_LEASE_SECONDS,
+)
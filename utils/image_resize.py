@@ -0,0 +1,39 @@
+import io
+from typing import Dict, Tuple
+
+# 파생본 이름 -> 긴 변의 최대 픽셀 수
+IMAGE_VARIANTS: Dict[str, int] = {
+    "thumb": 320,
+    "medium": 1080,
+}
+
+CONTENT_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+
+def render_variants(data: bytes, image_format: str, quality: int) -> Dict[str, Tuple[bytes, str]]:
+    """
+    원본 이미지 바이트로 파생본들을 만들어 {이름: (바이트, Content-Type)} 으로 반환합니다.
+    프로세스 풀에서 실행되므로 앱 모듈(DB, S3 등)은 import 하지 않습니다.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original) # 휴대폰 사진의 회전 정보 반영
+        image.load()
+
+    if image_format == "jpeg" and image.mode != "RGB":
+        image = image.convert("RGB") # JPEG은 투명도를 지원하지 않음
+    elif image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+
+    variants = {}
+    for name, max_side in IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((max_side, max_side), Image.LANCZOS) # 비율 유지, 원본보다 크게 늘리지 않음
+        buffer = io.BytesIO()
+        if image_format == "jpeg":
+            resized.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+        else:
+            resized.save(buffer, "WEBP", quality=quality, method=4)
+        variants[name] = (buffer.getvalue(), CONTENT_TYPES[image_format])
+    return variants
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import update
+
+from database.connection import AsyncSessionLocal, settings
+from models.diarys import Diary
+from utils.image_resize import IMAGE_VARIANTS, render_variants
+from utils.response_cache import response_cache
+from utils.s3 import BUCKET_NAME, reuse_object, s3, s3_key_from_image
+
+logger = logging.getLogger("uvicorn.error")
+
+# 리사이즈는 CPU 작업이므로 별도 프로세스에서 실행 (API 프로세스의 GIL을 잡지 않도록)
+# 스레드/이벤트 루프가 있는 프로세스에서 fork 하지 않도록 spawn 사용
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def variant_keys(image_key: str) -> Dict[str, str]:
+    """원본 키에서 파생본 키를 만듭니다. (images/<hash>.png -> images/<hash>_thumb.webp)"""
+    stem = os.path.splitext(image_key)[0]
+    ext = "jpg" if settings.IMAGE_VARIANT_FORMAT == "jpeg" else settings.IMAGE_VARIANT_FORMAT
+    return {name: f"{stem}_{name}.{ext}" for name in IMAGE_VARIANTS}
+
+
+def _download(key: str) -> bytes:
+    return s3.get_object(Bucket=BUCKET_NAME, Key=key)["Body"].read()
+
+
+def _upload(key: str, body: bytes, content_type: str):
+    # 파생본 키는 원본 키에서 결정되므로 내용이 바뀌지 않음 -> 장기 캐시 허용
+    s3.put_object(
+        Bucket=BUCKET_NAME, Key=key, Body=body,
+        ContentType=content_type, CacheControl="public, max-age=31536000, immutable",
+    )
+
+
+async def build_variants(image_key: str) -> Dict[str, str]:
+    """원본 이미지의 파생본을 만들어 S3에 올리고 {이름: 키}를 반환합니다. 이미 있으면 재사용합니다."""
+    keys = variant_keys(image_key)
+    # 기존 파생본은 재사용 표시(LastModified 갱신)를 해 두어 진행 중인 일괄 삭제 정리에서 제외되도록 함
+    exists = await asyncio.gather(*(run_in_threadpool(reuse_object, key) for key in keys.values()))
+    if all(exists):
+        return keys # 같은 원본(콘텐츠 주소 키)의 파생본이 이미 만들어져 있음
+
+    data = await run_in_threadpool(_download, image_key)
+    loop = asyncio.get_running_loop()
+    variants = await loop.run_in_executor(
+        get_executor(), render_variants, data, settings.IMAGE_VARIANT_FORMAT, settings.IMAGE_VARIANT_QUALITY
+    )
+    await asyncio.gather(*(
+        run_in_threadpool(_upload, keys[name], body, content_type)
+        for name, (body, content_type) in variants.items()
+    ))
+    return keys
+
+
+async def generate_diary_image_variants(diary_id: int, image: str):
+    """
+    업로드 후 백그라운드에서 실행: 일기 이미지의 썸네일/중간 크기 파생본을 만들고 키를 저장합니다.
+    그 사이 이미지가 바뀌었다면 저장하지 않습니다.
+    """
+    image_key = s3_key_from_image(image)
+    if not image_key:
+        return
+    try:
+        keys = await build_variants(image_key)
+    except Exception as e:
+        logger.warning(f"일기 {diary_id} 이미지 파생본 생성 실패: {e}")
+        return
+
+    async with AsyncSessionLocal() as session:
+        result = await session.exec(
+            update(Diary)
+            .where(Diary.id == diary_id, Diary.image == image)
+            .values(thumbnail=keys["thumb"], image_medium=keys["medium"])
+        )
+        await session.commit()
+    if result.rowcount:
+        response_cache.invalidate_public_diary(diary_id)
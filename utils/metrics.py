@@ -0,0 +1,210 @@
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+logger = logging.getLogger("uvicorn.error")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock() # S3 호출은 스레드 풀에서 기록됨
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # 레이블 조합 -> [버킷별 개수..., +Inf 개수, 합계]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            values = self._values.get(labels)
+            if values is None:
+                values = self._values[labels] = [0] * (len(self.buckets) + 2)
+            values[index] += 1
+            values[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(values)) for labels, values in self._values.items())
+        for labels, values in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {values[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus 텍스트 형식 (text/plain; version=0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP 요청 처리 시간", ("method", "route", "status")))
+http_request_db_queries = registry.register(Histogram(
+    "http_request_db_queries", "요청당 실행된 SQL 수", ("method", "route"), QUERY_COUNT_BUCKETS))
+http_request_db_duration = registry.register(Histogram(
+    "http_request_db_duration_seconds", "요청당 SQL 실행 시간 합계", ("method", "route")))
+http_slow_requests = registry.register(Counter(
+    "http_slow_requests_total", "SLOW_REQUEST_MS를 넘긴 요청 수", ("method", "route")))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "SQL 실행 시간 (백그라운드 작업 포함)"))
+external_request_duration = registry.register(Histogram(
+    "external_request_duration_seconds", "외부 서비스(Clova/S3) 호출 시간", ("service", "operation")))
+external_request_errors = registry.register(Counter(
+    "external_request_errors_total", "외부 서비스(Clova/S3) 호출 실패 수", ("service", "operation")))
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# 현재 요청의 SQL 통계 (요청 밖에서 실행되는 쿼리는 None)
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def observe_external(service: str, operation: str, started: float, error: bool = False):
+    """외부 호출 시간을 기록합니다. started는 time.perf_counter() 값"""
+    external_request_duration.observe(time.perf_counter() - started, service, operation)
+    if error:
+        external_request_errors.inc(service, operation)
+
+
+def instrument_engine(engine):
+    """엔진의 모든 SQL 실행 시간을 기록하고, 요청 안에서 실행된 쿼리는 요청별 통계에도 더합니다."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_started
+        db_query_duration.observe(elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+
+class MetricsMiddleware:
+    """
+    요청별 처리 시간/SQL 수/SQL 시간을 라우트 단위로 기록하는 ASGI 미들웨어.
+    slow_request_ms를 넘긴 요청은 JSON 한 줄로 로그를 남깁니다.
+    """
+
+    def __init__(self, app, slow_request_ms: float = 500):
+        self.app = app
+        self.slow_request_seconds = slow_request_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+        recorded = False
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code, recorded
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # 응답 전송이 끝난 시점에 기록 (이후 실행되는 BackgroundTasks 시간은 제외)
+                recorded = True
+                self._record(scope, status_code, time.perf_counter() - started, stats.queries, stats.db_seconds)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _request_stats.reset(token)
+            if not recorded:
+                # 응답을 끝까지 보내지 못한 경우 (예외, 클라이언트 연결 끊김)
+                self._record(scope, status_code, time.perf_counter() - started, stats.queries, stats.db_seconds)
+
+    def _record(self, scope, status_code: int, elapsed: float, queries: int, db_seconds: float):
+        # 경로 변수 대신 라우트 템플릿을 레이블로 사용 (/diarys/{diary_id})
+        route = getattr(scope.get("route"), "path", "unmatched")
+        method = scope["method"]
+        http_request_duration.observe(elapsed, method, route, str(status_code))
+        http_request_db_queries.observe(queries, method, route)
+        http_request_db_duration.observe(db_seconds, method, route)
+        if elapsed >= self.slow_request_seconds:
+            http_slow_requests.inc(method, route)
+            logger.warning(json.dumps({
+                "event": "slow_request",
+                "method": method,
+                "route": route,
+                "path": scope["path"],
+                "status": status_code,
+                "duration_ms": round(elapsed * 1000, 1),
+                "db_queries": queries,
+                "db_ms": round(db_seconds * 1000, 1),
+            }, ensure_ascii=False))
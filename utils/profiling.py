@@ -0,0 +1,163 @@
+import cProfile
+import io
+import itertools
+import marshal
+import pstats
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+from uuid import uuid4
+
+from fastapi import HTTPException
+
+from auth.jwt_handler import verify_jwt_token
+from database.connection import settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_FLAG = "profile=1"
+
+
+class ProfileStore:
+    """최근 프로파일 결과를 메모리에 보관합니다. (id -> 요청 정보 + pstats 데이터)"""
+
+    def __init__(self, max_results: int):
+        self.max_results = max_results
+        self._results: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile_id: str, profiler: cProfile.Profile, info: dict):
+        profiler.create_stats()
+        with self._lock:
+            self._results[profile_id] = {**info, "id": profile_id, "stats": marshal.dumps(profiler.stats)}
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+
+    def list(self) -> List[dict]:
+        with self._lock:
+            return [
+                {key: value for key, value in result.items() if key != "stats"}
+                for result in reversed(self._results.values())
+            ]
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._results.get(profile_id)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+
+class _StoredProfile:
+    # pstats.Stats가 읽을 수 있는 형태로 저장된 결과를 감쌈 (create_stats 호출 시 덮어쓰지 않도록)
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def _load_stats(result: dict) -> pstats.Stats:
+    return pstats.Stats(_StoredProfile(marshal.loads(result["stats"])))
+
+
+def render_text(result: dict, sort: str = "cumulative", limit: int = 50) -> str:
+    """pstats 표 형식 (sort: cumulative / tottime / ncalls)"""
+    output = io.StringIO()
+    stats = _load_stats(result)
+    stats.stream = output
+    stats.sort_stats(sort).print_stats(limit)
+    return output.getvalue()
+
+
+def render_pstats(result: dict) -> bytes:
+    """pstats 파일 (snakeviz, python -m pstats 로 열 수 있음)"""
+    return result["stats"]
+
+
+def render_collapsed(result: dict) -> str:
+    """
+    flamegraph.pl / speedscope에서 읽는 collapsed stack 형식.
+    cProfile은 호출자-피호출자 쌍만 기록하므로 한 단계 호출 관계(caller;callee)와 자체 시간(마이크로초)으로 표현합니다.
+    """
+    lines = []
+    for func, (_, _, tottime, _, callers) in _load_stats(result).stats.items():
+        name = f"{func[2]} ({func[0]}:{func[1]})"
+        if not callers:
+            lines.append(f"{name} {int(tottime * 1e6)}")
+        for caller, (_, _, caller_tottime, _) in callers.items():
+            lines.append(f"{caller[2]} ({caller[0]}:{caller[1]});{name} {int(caller_tottime * 1e6)}")
+    return "\n".join(line for line in lines if not line.endswith(" 0")) + "\n"
+
+
+def _is_admin(headers: dict) -> bool:
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        return verify_jwt_token(token).get("role") == "admin"
+    except HTTPException:
+        return False
+
+
+class ProfilingMiddleware:
+    """
+    요청을 cProfile로 실행하고 결과를 ProfileStore에 저장하는 ASGI 미들웨어.
+    관리자가 X-Profile: 1 헤더 또는 ?profile=1 을 보내거나, sample_rate(N)가 설정되면 N번째 요청마다 프로파일합니다.
+    PROFILING_ENABLED가 False면 등록하지 않으므로 평소에는 비용이 없습니다.
+
+    cProfile은 이벤트 루프 스레드 전체를 측정하므로 같은 시간에 처리된 다른 요청의 코드도 함께 기록되고,
+    스레드 풀에서 실행되는 작업(bcrypt 등)은 해당 await의 대기 시간으로만 나타납니다.
+    동시에 하나의 요청만 프로파일합니다.
+    """
+
+    def __init__(self, app, store: ProfileStore, sample_rate: int = 0):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self._counter = itertools.count(1)
+        self._active = threading.Lock()
+
+    def _should_profile(self, scope) -> bool:
+        if self.sample_rate and next(self._counter) % self.sample_rate == 0:
+            return True
+        headers = dict(scope["headers"])
+        requested = headers.get(PROFILE_HEADER) == b"1" or PROFILE_QUERY_FLAG in scope.get("query_string", b"").decode("latin-1").split("&")
+        return requested and _is_admin(headers)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_profile(scope) or not self._active.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid4().hex[:12]
+        status_code = 500
+
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # 응답 헤더로 결과 id를 알려줌 (/profiles/{id} 로 조회)
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.disable()
+            self._active.release()
+            self.store.add(profile_id, profiler, {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            })
+
+
+profile_store = ProfileStore(settings.PROFILE_MAX_RESULTS)
@@ -0,0 +1,72 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from fastapi import Request, Response, status
+
+from database.connection import settings
+
+
+class ResponseCache:
+    """
+    공개 피드/공개 일기 상세 응답 캐시.
+    직렬화된 JSON 바이트와 강한 ETag를 저장하고, 일기가 생성/수정/삭제될 때 관련 항목만 무효화합니다.
+    관리 명령이나 다른 워커 프로세스의 변경은 이 프로세스의 캐시를 무효화하지 못하므로
+    항목마다 ttl_seconds가 지나면 만료시켜 오래된 응답이 남는 시간을 제한합니다.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 30):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[bytes, str, float]]" = OrderedDict() # 키 -> (본문, ETag, 만료 시각)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[bytes, str]]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] <= time.monotonic():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0], entry[1]
+
+    def set(self, key: Hashable, body: bytes) -> Tuple[bytes, str]:
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self._entries[key] = (body, etag, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return body, etag
+
+    def invalidate_feed(self):
+        # 공개 일기 하나가 바뀌면 모든 피드 페이지의 내용/커서가 달라질 수 있음
+        for key in [key for key in self._entries if key[0] == "feed"]:
+            del self._entries[key]
+
+    def invalidate_diary(self, diary_id: int):
+        self._entries.pop(("diary", diary_id), None)
+
+    def invalidate_public_diary(self, diary_id: int):
+        self.invalidate_diary(diary_id)
+        self.invalidate_feed()
+
+    def clear(self):
+        self._entries.clear()
+
+
+def cached_json_response(request: Request, entry: Tuple[bytes, str]) -> Response:
+    """If-None-Match 가 현재 ETag와 같으면 본문 없이 304를 반환합니다."""
+    body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+response_cache = ResponseCache(ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS)
@@ -1,7 +1,16 @@
-import boto3, os
+import boto3, hashlib, os, re, time
+from datetime import datetime, timedelta, timezone
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+from collections import OrderedDict
 from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from typing import Iterable, List, Optional
+from urllib.parse import unquote, urlparse
 from uuid import uuid4
 
+from utils.metrics import observe_external
+
 load_dotenv()
 
 s3 = boto3.client(
@@ -13,6 +22,26 @@ s3 = boto3.client(
 
 BUCKET_NAME = os.getenv("AWS_S3_BUCKET")
 
+
+# S3 API 호출 시간/실패 수를 /metrics 에 기록 (presigned URL 생성은 네트워크 호출이 아니므로 제외)
+def _before_s3_call(context, **kwargs):
+    context["metrics_started"] = time.perf_counter()
+
+
+def _after_s3_call(http_response, model, context, **kwargs):
+    # HeadObject 404(객체 없음)는 정상적인 존재 확인 결과로 취급
+    error = http_response.status_code >= 400 and http_response.status_code != 404
+    observe_external("s3", model.name, context.pop("metrics_started"), error=error)
+
+
+def _after_s3_call_error(context, event_name, **kwargs):
+    observe_external("s3", event_name.rsplit(".", 1)[-1], context.pop("metrics_started"), error=True)
+
+
+s3.meta.events.register("before-call.s3", _before_s3_call)
+s3.meta.events.register("after-call.s3", _after_s3_call)
+s3.meta.events.register("after-call-error.s3", _after_s3_call_error)
+
 def upload_file_to_s3(file, filename=None) -> str:
     ext = file.filename.split('.')[-1]
     filename = filename or f"{uuid4()}.{ext}"
@@ -24,23 +53,227 @@ def upload_file_to_s3(file, filename=None) -> str:
         ExtraArgs={"ACL": "public-read", "ContentType": file.content_type}
     )
 
-    return f"https://{BUCKET_NAME}.s3.{os.getenv('AWS_REGION')}.amazonaws.com/{filename}"
+    return public_url(filename)
+
+
+def public_url(key: str) -> str:
+    # upload_file_to_s3가 Diary.image에 저장하는 공개 URL 형식
+    return f"https://{BUCKET_NAME}.s3.{os.getenv('AWS_REGION')}.amazonaws.com/{key}"
+
+
+# 큰 이미지는 멀티파트로 나눠 병렬 전송 (s3transfer 설정)
+MB = 1024 * 1024
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "8")) * MB,
+    multipart_chunksize=int(os.getenv("S3_MULTIPART_CHUNKSIZE_MB", "8")) * MB,
+    max_concurrency=int(os.getenv("S3_UPLOAD_CONCURRENCY", "4")),
+    use_threads=True,
+)
+HASH_CHUNK_SIZE = 1 * MB
+
+
+def _content_key(fileobj, ext: str) -> str:
+    # 파일을 청크 단위로 읽으며 해시 계산 (전체를 메모리에 올리지 않음)
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return f"images/{digest.hexdigest()}.{ext}" if ext else f"images/{digest.hexdigest()}"
+
+
+def _is_not_found(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+
+def reuse_object(key: str) -> bool:
+    """
+    기존 객체를 재사용할 때 호출합니다. 객체가 있으면 LastModified를 현재 시각으로 갱신하고 True를 반환합니다.
+    재사용한 키는 아직 어떤 일기도 참조하지 않을 수 있으므로, 일괄 삭제의 정리 작업은
+    최근 수정된 images/ 객체를 지우지 않습니다. (S3_CLEANUP_GRACE_SECONDS)
+    """
+    try:
+        head = s3.head_object(Bucket=BUCKET_NAME, Key=key)
+    except ClientError as e:
+        if _is_not_found(e):
+            return False
+        raise
+    # 같은 키로 복사 (메타데이터를 교체해야 제자리 복사가 허용되므로 기존 값을 그대로 지정)
+    extra_args = {"ContentType": head["ContentType"]} if head.get("ContentType") else {}
+    if head.get("CacheControl"):
+        extra_args["CacheControl"] = head["CacheControl"]
+    try:
+        s3.copy_object(
+            Bucket=BUCKET_NAME, Key=key, CopySource={"Bucket": BUCKET_NAME, "Key": key},
+            MetadataDirective="REPLACE", Metadata=head.get("Metadata", {}), **extra_args,
+        )
+    except ClientError as e:
+        if _is_not_found(e):
+            return False # 확인 직후 삭제됨 -> 새로 업로드
+        raise
+    return True
+
+
+def _upload_content_addressed(fileobj, ext: str, content_type: Optional[str]) -> dict:
+    key = _content_key(fileobj, ext)
+    if reuse_object(key):
+        # 같은 내용의 이미지가 이미 있으면 업로드하지 않고 기존 키 재사용
+        return {"key": key, "deduplicated": True}
+    extra_args = {"ContentType": content_type} if content_type else None
+    s3.upload_fileobj(fileobj, BUCKET_NAME, key, ExtraArgs=extra_args, Config=S3_TRANSFER_CONFIG)
+    return {"key": key, "deduplicated": False}
+
+
+async def upload_file_to_s3_async(file) -> dict:
+    """
+    UploadFile을 이벤트 루프를 막지 않고 S3에 업로드합니다.
+    내용의 SHA-256 해시를 키로 사용하므로 같은 이미지는 한 번만 저장됩니다.
+    반환값: {"key": 객체 키, "deduplicated": 기존 객체 재사용 여부}
+    """
+    ext = file.filename.rsplit('.', 1)[-1].lower() if file.filename and '.' in file.filename else ""
+    # UploadFile.file은 일정 크기 이상이면 디스크에 임시 저장되는 SpooledTemporaryFile이므로
+    # 스레드에서 청크 단위로 읽어 해시 계산 후 그대로 멀티파트 업로드
+    return await run_in_threadpool(_upload_content_addressed, file.file, ext, file.content_type)
 
 def get_presigned_url(file_type: str) -> dict:
-    s3 = boto3.client(
-        "s3",
-        aws_access_key_id=os.getenv("AWS_ACCESS_KEY"),
-        aws_secret_access_key=os.getenv("AWS_SECRET_KEY"),
-        region_name=os.getenv("AWS_REGION")
-    )
+    # 모듈 공용 클라이언트 사용 (호출마다 클라이언트를 만들면 botocore 모델/자격 증명 로딩 비용이 큼)
     filename = f"{uuid4()}"
     key = filename + '.' + file_type
     presigned_url = s3.generate_presigned_url(
         ClientMethod='put_object',
         Params={
-            'Bucket': os.getenv("AWS_S3_BUCKET"),
+            'Bucket': BUCKET_NAME,
             'Key': key,
         },
         ExpiresIn=3600
     )
-    return {"url": presigned_url, "key": key}
\ No newline at end of file
+    return {"url": presigned_url, "key": key}
+
+
+# 다운로드용 presigned URL 재사용 캐시 (키 -> (URL, 만료 시각))
+# 만료 직전(PRESIGNED_GET_REFRESH_MARGIN 초 이내)까지 같은 URL을 돌려줌
+PRESIGNED_GET_EXPIRES = 3600
+PRESIGNED_GET_REFRESH_MARGIN = 300
+MAX_PRESIGNED_GET_CACHE = 10000
+_presigned_get_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+def get_presigned_download_url(key: str) -> str:
+    now = time.time()
+    cached = _presigned_get_cache.get(key)
+    if cached and cached[1] - now > PRESIGNED_GET_REFRESH_MARGIN:
+        _presigned_get_cache.move_to_end(key)
+        return cached[0]
+
+    url = s3.generate_presigned_url(
+        ClientMethod='get_object',
+        Params={'Bucket': BUCKET_NAME, 'Key': key},
+        ExpiresIn=PRESIGNED_GET_EXPIRES
+    )
+    _presigned_get_cache[key] = (url, now + PRESIGNED_GET_EXPIRES)
+    _presigned_get_cache.move_to_end(key)
+    while len(_presigned_get_cache) > MAX_PRESIGNED_GET_CACHE:
+        _presigned_get_cache.popitem(last=False)
+    return url
+
+
+def s3_key_from_image(image: Optional[str]) -> Optional[str]:
+    """Diary.image 값(S3 키 또는 upload_file_to_s3가 반환한 URL)에서 객체 키를 추출합니다."""
+    if not image:
+        return None
+    if image.startswith("http://") or image.startswith("https://"):
+        return unquote(urlparse(image).path.lstrip("/")) or None
+    return image
+
+
+# 서버가 발급한 객체 키 형식
+# - /upload-image: images/<sha256>.<ext>, 파생본 images/<sha256>_<이름>.<ext>
+# - presigned PUT / upload_file_to_s3: <uuid4>.<ext>, 파생본 <uuid4>_<이름>.<ext>
+_ISSUED_KEY_RE = re.compile(
+    r"^(images/[0-9a-f]{64}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})(_[a-z]+)?(\.[A-Za-z0-9]+)?$"
+)
+
+
+def issued_s3_key(value: Optional[str]) -> Optional[str]:
+    """
+    Diary.image/thumbnail/image_medium 값이 서버가 발급한 이 버킷의 객체를 가리키면 키를 반환합니다.
+    image는 클라이언트가 보낸 문자열이므로, 삭제 대상은 반드시 이 함수를 통과한 키로 제한합니다.
+    """
+    if not value:
+        return None
+    if value.startswith("http://") or value.startswith("https://"):
+        if urlparse(value).netloc != urlparse(public_url("")).netloc:
+            return None # 다른 호스트/버킷의 URL
+    key = s3_key_from_image(value)
+    return key if key and _ISSUED_KEY_RE.match(key) else None
+
+
+# 백그라운드 S3 정리 작업 진행 상황 (task_id -> 상태)
+cleanup_tasks: "OrderedDict[str, dict]" = OrderedDict()
+MAX_CLEANUP_TASKS = 1000
+
+S3_DELETE_BATCH_SIZE = 1000 # delete_objects 한 번에 지울 수 있는 최대 키 수
+# 콘텐츠 주소 키(images/)는 다른 사용자의 업로드가 재사용할 수 있으므로 이 시간 안에 업로드/재사용된 객체는 지우지 않음
+# (재사용 직후 일기를 저장하기 전까지는 DB 참조 확인으로 보호되지 않음)
+S3_CLEANUP_GRACE_SECONDS = float(os.getenv("S3_CLEANUP_GRACE_SECONDS", "3600"))
+
+
+def _recently_modified(key: str) -> bool:
+    try:
+        head = s3.head_object(Bucket=BUCKET_NAME, Key=key)
+    except ClientError as e:
+        if _is_not_found(e):
+            return False # 이미 없는 객체는 삭제 요청해도 무방
+        raise
+    return head["LastModified"] > datetime.now(timezone.utc) - timedelta(seconds=S3_CLEANUP_GRACE_SECONDS)
+
+
+def create_cleanup_task(keys: List[str]) -> str:
+    task_id = str(uuid4())
+    cleanup_tasks[task_id] = {"status": "pending", "total": len(keys), "deleted": 0, "skipped": 0, "errors": []}
+    while len(cleanup_tasks) > MAX_CLEANUP_TASKS:
+        cleanup_tasks.popitem(last=False)
+    return task_id
+
+
+def delete_s3_objects(keys: Iterable[str], task_id: Optional[str] = None) -> dict:
+    """
+    S3 객체를 delete_objects로 1000개씩 묶어서 삭제합니다.
+    최근 S3_CLEANUP_GRACE_SECONDS 안에 업로드/재사용된 images/ 객체는 건너뜁니다. (skipped)
+    task_id가 있으면 cleanup_tasks에 진행 상황을 기록합니다. (BackgroundTasks에서 스레드로 실행)
+    """
+    progress = cleanup_tasks.get(task_id) if task_id else None
+    if progress is None:
+        progress = {"status": "pending", "total": 0, "deleted": 0, "skipped": 0, "errors": []}
+    keys = list(dict.fromkeys(keys)) # 중복 제거 (순서 유지)
+    progress["total"] = len(keys)
+    progress["status"] = "running"
+
+    for i in range(0, len(keys), S3_DELETE_BATCH_SIZE):
+        batch = []
+        for key in keys[i:i + S3_DELETE_BATCH_SIZE]:
+            try:
+                recent = key.startswith("images/") and _recently_modified(key)
+            except Exception as e:
+                progress["errors"].append({"key": key, "message": str(e)})
+                continue
+            if recent:
+                progress["skipped"] += 1
+            else:
+                batch.append(key)
+        if not batch:
+            continue
+        try:
+            response = s3.delete_objects(
+                Bucket=BUCKET_NAME,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+        except Exception as e:
+            progress["errors"].append({"keys": len(batch), "message": str(e)})
+            continue
+        errors = response.get("Errors", [])
+        progress["errors"].extend({"key": error.get("Key"), "message": error.get("Message")} for error in errors)
+        progress["deleted"] += len(batch) - len(errors)
+
+    progress["status"] = "done" if not progress["errors"] else "done_with_errors"
+    return progress
@@ -0,0 +1,121 @@
+import re
+import unicodedata
+from collections import Counter
+from typing import List, Tuple
+
+from sqlalchemy import delete
+from sqlmodel import func, or_, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.diarys import Diary
+from models.search import DiaryToken
+
+TITLE_WEIGHT = 3 # 제목에서 나온 n-gram은 본문보다 높은 점수
+CONTENT_WEIGHT = 1
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _compact(text: str) -> str:
+    # 정규화 후 공백/문장부호를 제거한 문자열 (띄어쓰기가 달라도 같은 토큰이 나오도록)
+    return "".join(_WORD_RE.findall(unicodedata.normalize("NFKC", text).lower()))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    텍스트를 검색 토큰(문자 bigram) 목록으로 변환합니다.
+    띄어쓰기를 무시하고 bigram을 만들기 때문에 "좋은 하루"와 "좋은하루"가 같은 토큰을 가집니다.
+    """
+    if not text:
+        return []
+    compact = _compact(text)
+    if len(compact) == 1:
+        return [compact]
+    return [compact[i:i + 2] for i in range(len(compact) - 1)]
+
+
+def build_tokens(diary_id: int, title: str, content: str) -> List[DiaryToken]:
+    weights: Counter = Counter()
+    for token in tokenize(title):
+        weights[token] += TITLE_WEIGHT
+    for token in tokenize(content):
+        weights[token] += CONTENT_WEIGHT
+    return [DiaryToken(token=token, diary_id=diary_id, weight=weight) for token, weight in weights.items()]
+
+
+async def remove_diary(session: AsyncSession, diary_id: int):
+    await session.exec(delete(DiaryToken).where(DiaryToken.diary_id == diary_id))
+
+
+async def remove_diaries(session: AsyncSession, diary_ids: List[int]):
+    await session.exec(delete(DiaryToken).where(DiaryToken.diary_id.in_(diary_ids)))
+
+
+async def index_diary(session: AsyncSession, diary: Diary):
+    """일기 한 건의 색인을 새로 작성합니다. (commit은 호출하는 쪽에서 수행)"""
+    await remove_diary(session, diary.id)
+    session.add_all(build_tokens(diary.id, diary.title, diary.content))
+
+
+async def search_diary_ids(session: AsyncSession, query: str, limit: int, offset: int = 0) -> List[Tuple[int, int]]:
+    """
+    공개 일기 중 검색어의 모든 토큰을 포함하는 일기를 점수 순으로 반환합니다.
+    반환값: [(diary_id, score), ...]
+    """
+    compact = _compact(query)
+    if not compact:
+        return []
+
+    if len(compact) == 1:
+        # 한 글자 검색어는 bigram 색인으로 찾을 수 없으므로 LIKE 검색으로 대체
+        statement = (
+            select(Diary.id)
+            .where(Diary.state == True, or_(Diary.title.ilike(f"%{compact}%"), Diary.content.ilike(f"%{compact}%")))
+            .order_by(Diary.id.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+        return [(diary_id, 0) for diary_id in (await session.exec(statement)).all()]
+
+    grams = sorted(set(tokenize(compact)))
+    score = func.sum(DiaryToken.weight).label("score")
+    statement = (
+        select(DiaryToken.diary_id, score)
+        .join(Diary, Diary.id == DiaryToken.diary_id)
+        .where(DiaryToken.token.in_(grams), Diary.state == True)
+        .group_by(DiaryToken.diary_id)
+        .having(func.count(DiaryToken.token) == len(grams)) # 모든 토큰을 포함하는 일기만
+        .order_by(score.desc(), DiaryToken.diary_id.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+    return [(diary_id, int(total)) for diary_id, total in (await session.exec(statement)).all()]
+
+
+async def rebuild_index(session: AsyncSession, chunk_size: int = 1000) -> int:
+    """
+    전체 일기 색인을 처음부터 다시 만듭니다. 처리한 일기 수를 반환합니다.
+    id 범위 청크마다 기존 토큰을 지우고 새로 넣은 뒤 commit하므로 재생성 중에도 검색이 동작합니다.
+    (범위로 지우기 때문에 이미 삭제된 일기의 남은 토큰도 함께 정리됨)
+    """
+    count = 0
+    last_id = 0
+    while True:
+        rows = (await session.exec(
+            select(Diary.id, Diary.title, Diary.content)
+            .where(Diary.id > last_id)
+            .order_by(Diary.id)
+            .limit(chunk_size)
+        )).all()
+        if not rows:
+            break
+        await session.exec(delete(DiaryToken).where(DiaryToken.diary_id > last_id, DiaryToken.diary_id <= rows[-1][0]))
+        for diary_id, title, content in rows:
+            session.add_all(build_tokens(diary_id, title, content))
+        await session.commit()
+        count += len(rows)
+        last_id = rows[-1][0]
+
+    await session.exec(delete(DiaryToken).where(DiaryToken.diary_id > last_id))
+    await session.commit()
+    return count